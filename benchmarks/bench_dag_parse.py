@@ -0,0 +1,69 @@
+"""Parse-time benchmark for the coincap_data DAG file.
+
+The scheduler re-imports the DAG file on every parse loop, so whatever runs at its module level is paid
+over and over. Each sample imports the DAG module in a fresh interpreter, after Airflow itself is
+loaded, and records how long the import took and which heavy libraries it pulled in.
+
+    python benchmarks/bench_dag_parse.py --repeat 5 --max-seconds 0.5
+
+Needs Airflow installed, but no metadata database, Variables or MinIO. Exits non-zero when the median
+exceeds ``--max-seconds`` or when a heavy library is imported at parse time, so it can gate CI.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+DAGS = Path(__file__).resolve().parent.parent / 'dags'
+HEAVY_MODULES = ['pandas', 'boto3', 'botocore', 'requests', 'pyarrow', 'dash']
+
+SAMPLE = """
+import json, sys, time
+import airflow, pendulum
+from airflow.decorators import dag, task
+from airflow.operators.bash import BashOperator
+before = set(sys.modules)
+start = time.perf_counter()
+import api_data_extract
+elapsed = time.perf_counter() - start
+heavy = sorted(m for m in {heavy} if m in sys.modules and m not in before)
+print(json.dumps({{'seconds': elapsed, 'modules': len(set(sys.modules) - before), 'heavy': heavy}}))
+"""
+
+
+def sample():
+    env = dict(os.environ, PYTHONPATH=str(DAGS), PYTHONWARNINGS='ignore')
+    result = subprocess.run([sys.executable, '-c', SAMPLE.format(heavy=HEAVY_MODULES)], cwd=DAGS, env=env,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--max-seconds', type=float, default=None, help='fail when the median is slower')
+    parser.add_argument('--json', action='store_true', help='print one JSON line for CI tracking')
+    args = parser.parse_args()
+
+    samples = [sample() for _ in range(args.repeat)]
+    median = statistics.median(s['seconds'] for s in samples)
+    heavy = sorted({m for s in samples for m in s['heavy']})
+    report = {'median_seconds': round(median, 4), 'min_seconds': round(min(s['seconds'] for s in samples), 4),
+              'modules_imported': samples[-1]['modules'], 'heavy_imports': heavy}
+
+    if args.json:
+        print(json.dumps(report))
+    else:
+        print(f"DAG module import: median {median * 1000:.1f} ms over {args.repeat} runs "
+              f"({report['modules_imported']} modules)")
+        print(f"heavy imports at parse time: {', '.join(heavy) or 'none'}")
+
+    if heavy or (args.max_seconds is not None and median > args.max_seconds):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""Cold-start benchmark for the dashboard (dags/dashboard, served by dash_app/app.py).
+
+Each sample starts the dashboard in a fresh interpreter against a local store of synthetic clean files
+(``file://``, see coincap.storage) and records:
+
+* startup: importing the app and registering its pages, the time before gunicorn can accept requests
+* first response: the app shell at ``/``
+* data ready: every registered page rendered with its data, once the background load is done
+
+    python benchmarks/bench_dashboard_startup.py --assets 2000 --exchanges 300 --coin-markets 5000
+
+Startup should not grow with the amount of data, only "data ready" should. Exits non-zero when the
+median startup exceeds ``--max-seconds``, or when the startup imported one of DEFERRED_MODULES, so it
+can gate CI. Needs no network or MinIO.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import date
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'dags'))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+import pandas as pd
+
+from bench_pipeline import Payloads
+from coincap.layout import clean_key, coin_markets_key
+from coincap.schema import apply_schema
+
+# Loaded with the data, after startup; importing one of these while starting means a page reads eagerly again
+DEFERRED_MODULES = ['plotly.express', 'boto3']
+
+SAMPLE = """
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {dash_app!r})
+import app
+started = time.perf_counter()
+deferred = sorted(m for m in {deferred} if m in sys.modules)
+import dash
+from dashboard import data
+client = app.server.test_client()
+client.get('/')
+first = time.perf_counter()
+paths = [page['path'] for page in dash.page_registry.values()]
+for path in paths:
+    response = client.post('/_dash-update-component', json={{
+        'output': 'page-content.children', 'outputs': {{'id': 'page-content', 'property': 'children'}},
+        'inputs': [{{'id': 'url', 'property': 'pathname', 'value': path}}], 'changedPropIds': ['url.pathname']}})
+    assert response.status_code == 200, (path, response.status_code)
+ready = time.perf_counter()
+loaded = [lazy.dataset for lazy in data._partitions if lazy.current()['dt']]
+print(json.dumps({{'startup': started - start, 'first_response': first - start, 'data_ready': ready - start,
+                  'pages': len(paths), 'datasets': loaded, 'deferred': deferred}}))
+"""
+
+
+def write_store(root, assets, exchanges, coin_markets, coins):
+    # The clean files of one day, as the transform writes them
+    payloads = Payloads(assets, exchanges, 0, coin_markets, served_ms=1735689600000)
+    dt = date.today().isoformat()
+
+    def write(key, records):
+        df = pd.DataFrame(records)
+        df.insert(0, 'timestamp', pd.to_datetime(payloads.served_ms, unit='ms'))
+        path = Path(root) / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        apply_schema(df).to_parquet(path, index=False, compression='zstd')
+
+    write(clean_key(dt, 'assets', 'coincap_assets'), payloads.assets)
+    write(clean_key(dt, 'exchanges', 'coincap_exchanges'), payloads.exchanges)
+    for coin in range(min(coins, assets)):
+        write(coin_markets_key(dt, f'coin-{coin}'), [payloads.market(coin, n) for n in range(coin_markets)])
+
+
+def sample(store, cache_dir):
+    env = dict(os.environ, COINCAP_STORAGE_URL=f'file://{store}', COINCAP_CACHE_DIR=cache_dir,
+               PYTHONWARNINGS='ignore')
+    script = SAMPLE.format(dash_app=str(ROOT / 'dash_app'), deferred=DEFERRED_MODULES)
+    result = subprocess.run([sys.executable, '-c', script], cwd=ROOT / 'dash_app', env=env,
+                            capture_output=True, text=True)
+    if result.returncode:
+        raise SystemExit(result.stderr)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--assets', type=int, default=2000)
+    parser.add_argument('--exchanges', type=int, default=300)
+    parser.add_argument('--coin-markets', type=int, default=5000, help='markets of each coin')
+    parser.add_argument('--coins', type=int, default=10, help='coins with a coin_markets file')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--max-seconds', type=float, default=None, help='fail when the median startup is slower')
+    parser.add_argument('--json', action='store_true', help='print one JSON line for CI tracking')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = Path(tmp) / 'store'
+        write_store(store, args.assets, args.exchanges, args.coin_markets, args.coins)
+        # A fresh shared cache per sample, so every one pays the Arrow conversion like a first deploy
+        samples = [sample(store, str(Path(tmp) / f'cache-{i}')) for i in range(args.repeat)]
+
+    report = {name: round(statistics.median(s[name] for s in samples), 4)
+              for name in ('startup', 'first_response', 'data_ready')}
+    report.update(pages=samples[-1]['pages'], datasets=samples[-1]['datasets'],
+                  deferred_imported=sorted({m for s in samples for m in s['deferred']}))
+
+    if args.json:
+        print(json.dumps(report))
+    else:
+        print(f"dashboard startup: median {report['startup']:.2f}s, first response {report['first_response']:.2f}s, "
+              f"all {report['pages']} pages with data {report['data_ready']:.2f}s over {args.repeat} runs")
+        print(f"datasets loaded: {', '.join(report['datasets']) or 'none'}")
+        print(f"deferred modules imported at startup: {', '.join(report['deferred_imported']) or 'none'}")
+
+    if report['deferred_imported'] or (args.max_seconds is not None and report['startup'] > args.max_seconds):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Wall-clock comparison of the serial extract loop against the pooled, concurrent fetch layer.
+
+The serial variant mirrors the original DAG: a bare ``requests.get`` per endpoint, the three top-level
+endpoints first and then every per-currency markets call. The concurrent variant runs both task
+batches side by side, each fanning out over one pooled session.
+
+    python benchmarks/bench_fetch.py --currencies 50 --latency 0.1 --workers 8
+"""
+import argparse
+import time
+
+import requests
+
+from stub_api import serve
+from coincap.fetch import make_session, run_concurrently
+
+TOP_LEVEL = ['/assets', '/exchanges', '/markets']
+
+
+def build_urls(base_url, currencies):
+    top_level = [base_url + endpoint for endpoint in TOP_LEVEL]
+    markets = [f'{base_url}/assets/coin-{i}/markets' for i in range(currencies)]
+    return top_level, markets
+
+
+def serial(batches, workers):
+    for batch in batches:
+        for url in batch:
+            requests.get(url).json()
+
+
+def concurrent(batches, workers):
+    def run_batch(batch):
+        with make_session(workers) as session:
+            run_concurrently(lambda url: session.get(url).content, batch, workers)
+
+    run_concurrently(run_batch, batches, len(batches))
+
+
+def timed(func, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--currencies', type=int, default=6, help='per-currency markets calls')
+    parser.add_argument('--latency', type=float, default=0.1, help='stub server delay per request (s)')
+    parser.add_argument('--workers', type=int, default=8, help='concurrency limit per task')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with serve(latency=args.latency) as base_url:
+        batches = build_urls(base_url, args.currencies)
+        total = sum(len(batch) for batch in batches)
+        serial_time = timed(serial, batches, args.workers, repeat=args.repeat)
+        concurrent_time = timed(concurrent, batches, args.workers, repeat=args.repeat)
+
+    print(f"{total} requests, {args.latency * 1000:.0f} ms latency, {args.workers} workers")
+    print(f"serial loop:      {serial_time:8.3f} s")
+    print(f"pooled/threaded:  {concurrent_time:8.3f} s")
+    print(f"speedup:          {serial_time / concurrent_time:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
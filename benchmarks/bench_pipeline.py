@@ -0,0 +1,354 @@
+"""End-to-end benchmark of the coincap_data tasks against a local API stub and an in-process S3.
+
+Synthetic CoinCap-shaped assets, exchanges, markets and history are served by the stub API
+(benchmarks/stub_api.py), and the bucket is a moto S3 mock (``--storage local`` keeps it in a temporary
+directory instead). The task bodies in coincap.pipeline then run in DAG order for each day, and every
+stage reports its wall time, peak RSS (this process plus the transform's worker processes), the API
+and storage bytes it moved, and the rows it handled per second.
+
+    python benchmarks/bench_pipeline.py --assets 2000 --markets 100000 --coins 20 --days 3
+
+moto is only needed here: ``pip install moto``.
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from stub_api import serve
+from coincap import config, pipeline
+from coincap.fetch import PAGE_LIMIT
+from coincap.history import DAY_MS, INTERVAL_MS
+from coincap.layout import clean_key, quality_key
+from coincap.ledger import read_ledger
+from coincap.snapshots import KEY_COLUMNS, daily_key
+from coincap.storage import LocalStorage, Storage
+
+BUCKET = 'bucket1'
+QUOTES = [('tether', 'USDT'), ('bitcoin', 'BTC'), ('united-states-dollar', 'USD')]
+
+
+class Payloads:
+    """CoinCap-shaped responses for the stub API, generated once per list and paged like the real API."""
+
+    def __init__(self, assets, exchanges, markets, coin_markets, served_ms):
+        self.served_ms = served_ms
+        self.coin_markets = coin_markets
+        self.exchanges = [self.exchange(i) for i in range(exchanges)]
+        self.assets = [self.asset(i) for i in range(assets)]
+        # (exchangeId, baseId, quoteId) is unique per market, as in the API
+        self.markets = [self.market(i % assets, i // assets) for i in range(markets)]
+        self.records = 0
+        self.lock = threading.Lock()
+
+    def asset(self, i):
+        price = 50_000 / (i + 1)
+        return {'id': f'coin-{i}', 'rank': str(i + 1), 'symbol': f'C{i}', 'name': f'Coin {i}',
+                'supply': f'{1e7 * (i + 1):.1f}', 'maxSupply': None if i % 3 else f'{2e7 * (i + 1):.1f}',
+                'marketCapUsd': f'{price * 1e7 * (i + 1):.4f}', 'volumeUsd24Hr': f'{1e9 / (i + 1):.4f}',
+                'priceUsd': f'{price:.8f}', 'changePercent24Hr': f'{(i % 21) - 10.5:.4f}',
+                'vwap24Hr': f'{price * 0.99:.8f}', 'explorer': f'https://explorer.example/{i}'}
+
+    def exchange(self, i):
+        return {'exchangeId': f'exchange-{i}', 'name': f'Exchange {i}', 'rank': str(i + 1),
+                'percentTotalVolume': f'{20 / (i + 1):.6f}', 'volumeUsd': f'{5e9 / (i + 1):.4f}',
+                'tradingPairs': str(10 + i % 900), 'socket': bool(i % 2),
+                'exchangeUrl': f'https://exchange-{i}.example/', 'updated': self.served_ms - i}
+
+    def market(self, coin, n):
+        quote_id, quote_symbol = QUOTES[n % len(QUOTES)]
+        price = 50_000 / (coin + 1)
+        return {'exchangeId': f'exchange-{n // len(QUOTES)}',
+                'rank': str(n + 1), 'baseSymbol': f'C{coin}', 'baseId': f'coin-{coin}',
+                'quoteSymbol': quote_symbol, 'quoteId': quote_id, 'priceQuote': f'{price:.8f}',
+                'priceUsd': f'{price:.8f}', 'volumeUsd24Hr': f'{1e6 / (n + 1):.4f}',
+                'percentExchangeVolume': f'{(n % 100) / 7:.6f}',
+                'tradesCount24Hr': str(n % 9000) if n % 5 else None, 'updated': self.served_ms - n}
+
+    def history(self, coin, interval, start, end):
+        step = INTERVAL_MS[interval]
+        price = 50_000 / (int(coin.rsplit('-', 1)[-1]) + 1)
+        return [{'priceUsd': f'{price * (1 + 0.05 * ((t // step) % 17 - 8) / 8):.8f}', 'time': t,
+                 'date': datetime.fromtimestamp(t / 1000, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z')}
+                for t in range(start - start % step + (step if start % step else 0), end + 1, step)]
+
+    def __call__(self, path):
+        url = urlparse(path)
+        query = parse_qs(url.query)
+        parts = url.path.strip('/').split('/')[1:]  # without the /v2 prefix
+        if parts[-1] == 'history':
+            data = self.history(parts[1], query['interval'][0], int(query['start'][0]), int(query['end'][0]))
+        else:
+            if parts == ['assets']:
+                rows = self.assets
+            elif parts == ['exchanges']:
+                rows = self.exchanges
+            elif parts == ['markets']:
+                rows = self.markets
+            elif len(parts) == 3 and parts[2] == 'markets':
+                coin = int(parts[1].rsplit('-', 1)[-1])
+                rows = [self.market(coin, n) for n in range(self.coin_markets)]
+            else:
+                rows = []
+            offset = int(query.get('offset', [0])[0])
+            data = rows[offset:offset + int(query.get('limit', [PAGE_LIMIT])[0])]
+        with self.lock:
+            self.records += len(data)
+        return {'data': data, 'timestamp': self.served_ms}
+
+
+class CountingStorage(Storage):
+    """Wraps a storage and counts the bytes read from and written to it."""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.read = self.written = 0
+        self.lock = threading.Lock()
+
+    def _count(self, attr, size):
+        with self.lock:
+            setattr(self, attr, getattr(self, attr) + size)
+
+    def get(self, key):
+        body = self.inner.get(key)
+        self._count('read', len(body))
+        return body
+
+    def stream(self, key):
+        storage, f = self, self.inner.stream(key)
+
+        class Counted:
+            def read(self, size=-1):
+                chunk = f.read(size)
+                storage._count('read', len(chunk))
+                return chunk
+
+            def close(self):
+                f.close()
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                self.close()
+
+        return Counted()
+
+    def buffer(self, key):
+        body = self.inner.buffer(key)
+        self._count('read', len(body))
+        return body
+
+    def put(self, key, body, content_type=None, metadata=None):
+        if isinstance(body, (bytes, bytearray, memoryview)):
+            size = len(body)
+        else:
+            position = body.tell()
+            size = body.seek(0, os.SEEK_END) - position
+            body.seek(position)
+        self.inner.put(key, body, content_type=content_type, metadata=metadata)
+        self._count('written', size)
+
+    def list(self, prefix):
+        return self.inner.list(prefix)
+
+    def head(self, key):
+        return self.inner.head(key)
+
+    def delete(self, keys):
+        return self.inner.delete(keys)
+
+
+def rss_bytes():
+    # Resident size of this process and its direct children (the transform's spawned workers)
+    pids = ['self']
+    for task in Path('/proc/self/task').iterdir():
+        try:
+            pids.extend((task / 'children').read_text().split())
+        except OSError:
+            # The thread exited while being listed
+            pass
+    total = 0
+    for pid in pids:
+        try:
+            total += int(Path(f'/proc/{pid}/statm').read_text().split()[1])
+        except (OSError, IndexError, ValueError):
+            pass
+    return total * os.sysconf('SC_PAGE_SIZE')
+
+
+@contextmanager
+def peak_rss(result, interval=0.01):
+    """Sample the RSS while the block runs and store the highest value in ``result['peak_rss']``."""
+    if not Path('/proc/self/statm').exists():
+        # Without /proc only the process-wide high-water mark is known (KiB on Linux, bytes on macOS)
+        scale = 1 if sys.platform == 'darwin' else 1024
+        yield
+        result['peak_rss'] = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                                 resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) * scale
+        return
+    done = threading.Event()
+    peak = [rss_bytes()]
+
+    def sample():
+        while not done.wait(interval):
+            peak[0] = max(peak[0], rss_bytes())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        yield
+    finally:
+        done.set()
+        sampler.join()
+        result['peak_rss'] = max(peak[0], rss_bytes())
+
+
+def parquet_rows(storage, keys):
+    return sum(pq.ParquetFile(pa.py_buffer(storage.buffer(key))).metadata.num_rows for key in keys)
+
+
+def raw_rows(storage, dt):
+    return sum(report['rows'] for report in json.loads(storage.get(quality_key(dt)))['reports'])
+
+
+def clean_rows(storage, dt):
+    return parquet_rows(storage, list(read_ledger(storage, dt)))
+
+
+def snapshot_rows(storage, dt):
+    return parquet_rows(storage, [daily_key(dataset, dt) for dataset in KEY_COLUMNS
+                                  if storage.exists(daily_key(dataset, dt))])
+
+
+class Stages:
+    """Runs the task bodies and accumulates the measurements of each stage over all days."""
+
+    def __init__(self, storage, payloads, api_stats):
+        self.storage = storage
+        self.payloads = payloads
+        self.api_stats = api_stats
+        self.results = {}
+
+    def run(self, name, func, rows=None):
+        # rows(): the rows the stage handled, when they are not the API records it fetched
+        api_bytes, records = self.api_stats.get('bytes', 0), self.payloads.records
+        read, written = self.storage.read, self.storage.written
+        measured = {}
+        with peak_rss(measured):
+            start = time.perf_counter()
+            value = func()
+            elapsed = time.perf_counter() - start
+        result = self.results.setdefault(name, {'seconds': 0.0, 'peak_rss': 0, 'api': 0, 'read': 0,
+                                                'written': 0, 'rows': 0})
+        result['seconds'] += elapsed
+        result['peak_rss'] = max(result['peak_rss'], measured['peak_rss'])
+        result['api'] += self.api_stats.get('bytes', 0) - api_bytes
+        # Counting the rows reads the storage too, so the byte counters are taken before
+        result['read'] += self.storage.read - read
+        result['written'] += self.storage.written - written
+        result['rows'] += rows() if rows else self.payloads.records - records
+        return value
+
+    def day(self, dt):
+        inner = self.storage.inner
+        self.run('extract', lambda: pipeline.data_extract_to_minio(dt))
+        coins = self.run('top_currencies', lambda: pipeline.top_currencies(dt), rows=lambda: len(self.payloads.assets))
+        self.run('currency_markets', lambda: [pipeline.currency_markets_data(coin, dt) for coin in coins])
+        self.run('validate', lambda: pipeline.validate_data(dt), rows=lambda: raw_rows(inner, dt))
+        self.run('transform', lambda: pipeline.transform_data(dt), rows=lambda: clean_rows(inner, dt))
+        self.run('append_snapshots', lambda: pipeline.append_snapshots(dt), rows=lambda: snapshot_rows(inner, dt))
+        self.run('compact_snapshots', lambda: pipeline.compact_snapshots(dt), rows=lambda: 0)
+        # The day's history is fetched once the day is over
+        now_ms = int(datetime.fromisoformat(dt).replace(tzinfo=timezone.utc).timestamp() * 1000) + DAY_MS
+        self.run('history', lambda: [pipeline.currencies_historic_data(coin, now_ms) for coin in coins])
+        self.run('derived_metrics', lambda: pipeline.derived_metrics(coins, dt),
+                 rows=lambda: parquet_rows(inner, [clean_key(dt, 'metrics', 'coin_metrics')]))
+
+
+@contextmanager
+def bucket(kind):
+    if kind == 'local':
+        with tempfile.TemporaryDirectory() as tmp:
+            yield LocalStorage(tmp)
+        return
+    try:
+        import boto3
+        from moto import mock_aws
+    except ImportError:
+        raise SystemExit("moto is needed for --storage moto (pip install moto), or run with --storage local")
+    from coincap.storage import S3Storage
+
+    for name in ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY'):
+        os.environ.setdefault(name, 'testing')
+    with mock_aws():
+        client = boto3.client('s3', region_name='us-east-1')
+        client.create_bucket(Bucket=BUCKET)
+        yield S3Storage(client, BUCKET)
+
+
+def report(results, days):
+    print(f"{'stage':18} {'seconds':>8} {'peak RSS':>9} {'API in':>9} {'read':>9} {'written':>9} "
+          f"{'rows':>9} {'rows/s':>10}")
+    for name, result in results.items():
+        rate = result['rows'] / result['seconds'] if result['seconds'] else 0
+        print(f"{name:18} {result['seconds']:8.2f} {result['peak_rss'] / 2**20:6.0f} MiB "
+              + ' '.join(f"{result[column] / 2**20:5.1f} MiB" for column in ('api', 'read', 'written'))
+              + f" {result['rows']:9d} {rate:10.0f}")
+    total = sum(result['seconds'] for result in results.values())
+    print(f"{'total':18} {total:8.2f} s over {days} day(s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--assets', type=int, default=2000, help='records in /assets')
+    parser.add_argument('--exchanges', type=int, default=200, help='records in /exchanges')
+    parser.add_argument('--markets', type=int, default=50_000, help='records in /markets')
+    parser.add_argument('--coin-markets', type=int, default=500, help='records in /assets/<coin>/markets')
+    parser.add_argument('--coins', type=int, default=10, help='top coins whose markets and history are fetched')
+    parser.add_argument('--interval', default='d1', choices=sorted(INTERVAL_MS), help='history interval')
+    parser.add_argument('--days', type=int, default=1, help='consecutive daily runs')
+    parser.add_argument('--start', default='2025-01-30', help='first run date (YYYY-MM-DD)')
+    parser.add_argument('--latency', type=float, default=0.0, help='stub API delay per request (s)')
+    parser.add_argument('--storage', choices=['moto', 'local'], default='moto')
+    parser.add_argument('--json', action='store_true', help='print the results as JSON')
+    args = parser.parse_args()
+
+    first = date.fromisoformat(args.start)
+    dates = [(first + timedelta(days=i)).isoformat() for i in range(args.days)]
+    served_ms = int(datetime.fromisoformat(dates[-1]).replace(tzinfo=timezone.utc).timestamp() * 1000)
+    payloads = Payloads(args.assets, args.exchanges, args.markets, args.coin_markets, served_ms)
+    settings = {'COINCAP_TOP_N': args.coins, 'COINCAP_HISTORY_INTERVAL': args.interval}
+    api_stats = {}
+
+    with bucket(args.storage) as inner, serve(args.latency, payloads, api_stats) as base_url:
+        storage = CountingStorage(inner)
+        # The task bodies read their settings and storage through coincap.config
+        config.storage = lambda: storage
+        config.variable = lambda name, default=None: settings.get(name, default)
+        pipeline.BASE_URL = base_url + '/v2'
+        stages = Stages(storage, payloads, api_stats)
+        for dt in dates:
+            stages.day(dt)
+
+    if args.json:
+        print(json.dumps(stages.results, indent=2))
+    else:
+        print(f"{args.assets} assets, {args.exchanges} exchanges, {args.markets} markets, {args.coins} coins x "
+              f"{args.coin_markets} markets, {args.interval} history, {args.storage} storage")
+        report(stages.results, args.days)
+
+
+if __name__ == '__main__':
+    main()
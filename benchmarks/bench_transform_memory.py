@@ -0,0 +1,128 @@
+"""Peak-memory comparison of the whole-payload transform against the streaming, batched one.
+
+A synthetic markets payload (CoinCap's paginated response shape, 2000 records per page) is written as a
+raw blob. Each variant then transforms it into Parquet in a fresh interpreter, and the growth of that
+process's peak RSS over its resident size before the transform is reported.
+
+    python benchmarks/bench_transform_memory.py --records 200000 --batch-size 10000
+
+The whole-payload variant is the previous implementation: decompress the blob, ``json.loads`` every
+page, ``json_normalize`` all records and write one frame.
+"""
+import argparse
+import gzip
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'dags'))
+
+PAGE_LIMIT = 2000
+
+
+def market(i):
+    return {
+        # (exchangeId, baseId, quoteId) is unique per market, as in the API
+        'exchangeId': f'exchange-{i // 3000}', 'rank': str(i % 5000 + 1),
+        'baseSymbol': f'C{i % 3000}', 'baseId': f'coin-{i % 3000}',
+        'quoteSymbol': 'USDT' if i % 3 else 'BTC', 'quoteId': 'tether' if i % 3 else 'bitcoin',
+        'priceQuote': f'{i * 0.37:.8f}', 'priceUsd': f'{i * 0.41:.8f}',
+        'volumeUsd24Hr': f'{i * 13.7:.4f}', 'percentExchangeVolume': f'{(i % 100) / 7:.6f}',
+        'tradesCount24Hr': str(i % 9000) if i % 5 else None, 'updated': 1735689600000 + i,
+    }
+
+
+def write_payload(path, records):
+    with gzip.open(path, 'wb', compresslevel=6) as gz:
+        for start in range(0, records, PAGE_LIMIT):
+            page = {'data': [market(i) for i in range(start, min(start + PAGE_LIMIT, records))],
+                    'timestamp': 1735689600000}
+            gz.write(json.dumps(page, separators=(',', ':')).encode('utf-8') + b'\n')
+
+
+def whole_payload(blob, batch_size):
+    import io
+
+    import pandas as pd
+
+    from coincap.schema import apply_schema
+
+    records, timestamp = [], None
+    for line in gzip.decompress(blob).splitlines():
+        page = json.loads(line)
+        records.extend(page.get('data') or [])
+        timestamp = page.get('timestamp', timestamp)
+    df = pd.json_normalize(records)
+    df.insert(0, 'timestamp', pd.to_datetime(timestamp, unit='ms'))
+    fo = io.BytesIO()
+    apply_schema(df).to_parquet(fo, index=False, compression='zstd')
+    return fo.getvalue()
+
+
+def streaming(blob, batch_size):
+    from coincap.transform import transform_blob
+
+    return transform_blob(blob, batch_size=batch_size)
+
+
+VARIANTS = {'whole-payload': whole_payload, 'streaming': streaming}
+
+
+def peak_rss_kib():
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def child(variant, path, batch_size):
+    # Imports and the compressed blob are in memory before the baseline, so only the transform is measured
+    import pandas  # noqa: F401
+    import pyarrow.parquet  # noqa: F401
+
+    import coincap.transform  # noqa: F401
+
+    blob = Path(path).read_bytes()
+    before = peak_rss_kib()
+    start = time.perf_counter()
+    out = VARIANTS[variant](blob, batch_size)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({'peak_mib': (peak_rss_kib() - before) / 1024, 'seconds': elapsed, 'bytes': len(out)}))
+
+
+def measure(variant, path, batch_size):
+    result = subprocess.run([sys.executable, __file__, '--child', variant, path, '--batch-size', str(batch_size)],
+                            check=True, capture_output=True, text=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--records', type=int, default=200_000, help='market records in the payload')
+    parser.add_argument('--batch-size', type=int, default=10_000, help='records per batch (streaming)')
+    parser.add_argument('--child', nargs=2, metavar=('VARIANT', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child, args.batch_size)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'markets.jsonl.gz')
+        write_payload(path, args.records)
+        size = os.path.getsize(path)
+        results = {variant: measure(variant, path, args.batch_size) for variant in VARIANTS}
+
+    print(f"{args.records} records, {size / 2**20:.1f} MiB compressed, batch size {args.batch_size}")
+    for variant, result in results.items():
+        print(f"{variant + ':':15} peak +{result['peak_mib']:7.1f} MiB  {result['seconds']:7.2f} s  "
+              f"parquet {result['bytes'] / 2**20:.1f} MiB")
+    ratio = results['whole-payload']['peak_mib'] / max(results['streaming']['peak_mib'], 0.1)
+    print(f"peak memory reduction: {ratio:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
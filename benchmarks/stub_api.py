@@ -0,0 +1,57 @@
+"""Local stand-in for api.coincap.io used by the benchmarks.
+
+Every GET is answered with a small CoinCap-shaped JSON body after an artificial delay, which stands in
+for the round trip to the real API. The server speaks HTTP/1.1 so pooled clients can keep connections
+alive, and it answers each connection on its own thread like a real API would. Pass a ``stats`` dict
+to have the requests and response bytes counted into it.
+"""
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Make the DAG helpers importable when a benchmark is run as a script.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'dags'))
+
+
+def default_payload(path):
+    return {"data": [{"id": path.strip('/').replace('/', '-'), "priceUsd": "1.0"}],
+            "timestamp": int(time.time() * 1000)}
+
+
+@contextmanager
+def serve(latency=0.05, payload=default_payload, stats=None):
+    """Run the stub server in a background thread and yield its base url."""
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            time.sleep(latency)
+            body = json.dumps(payload(self.path)).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            if stats is not None:
+                with lock:
+                    stats['requests'] = stats.get('requests', 0) + 1
+                    stats['bytes'] = stats.get('bytes', 0) + len(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_port}'
+    finally:
+        server.shutdown()
+        server.server_close()
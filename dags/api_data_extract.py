@@ -1,149 +1,103 @@
-import io
-import json
-import logging
-from datetime import timedelta, datetime
-from io import BytesIO
+from datetime import timedelta
 from pathlib import Path
 
-import airflow
-import boto3
-import pandas as pd
-import requests
-import requests.exceptions as request_exceptions
+import pendulum
 from airflow.decorators import dag, task
-from airflow.exceptions import AirflowSkipException
-from airflow.models import Variable
 from airflow.operators.bash import BashOperator
-from botocore.exceptions import ClientError
 from pendulum import duration
 
+# Only cheap work happens at module level: the scheduler re-runs it on every parse of this file. Clients,
+# Airflow Variables and the heavy libraries are loaded inside the tasks (see coincap.pipeline).
 pwd = Path('/opt/airflow/data/')
 app_path = Path("/opt/airflow/dash_app/app.py")
-date = datetime.today().strftime("%Y_%m_%d")
-end_epoch_time = (datetime.today() - timedelta(days=1)).timestamp()
-start_epoch_time = (datetime.today() - timedelta(days=100)).timestamp()
-minio_bucket = "bucket1"
-s3_client = boto3.client(
-    's3',
-    aws_access_key_id=Variable.get("AWS_ACCESS_KEY_ID"),
-    aws_secret_access_key=Variable.get('AWS_SECRET_ACCESS_KEY'),
-    endpoint_url=Variable.get("AWS_S3_ENDPOINT"),
-    config=boto3.session.Config(signature_version='v4'),
-
-)
-
-global df
-
-
-def data_is_available(prefix):
-    response = s3_client.list_objects_v2(Bucket=minio_bucket, Prefix=prefix)
-    print(prefix)
-    # Print the list of file names if 'Contents' in response:
-    if 'Contents' in response:
-        for obj in response['Contents']:
-            print(obj['Key'])
-            return True
-    else:
-        return False
-
-
-# Function to get data from api and load to minio bucket
-def api_data(url, folder, filename):
-    dest_file = f'raw/{folder}/{filename}_{date}.json'
-    try:
-        response = requests.get(url)
-        data = response.json()
-        fo = io.BytesIO(json.dumps(data).encode('utf-8'))
+# Per-coin mapped tasks running at once in one DAG run, to stay within the API's rate limit.
+MAX_ACTIVE_COIN_TASKS = 16
 
-        try:
-            s3_client.upload_fileobj(fo, minio_bucket, dest_file)
-        except ClientError as e:
-            logging.error(e)
 
-    except request_exceptions.MissingSchema:
-        print(f"{url} appears to be invalid url.")
-    except request_exceptions.ConnectionError:
-        print(f"could not connect to {url}")
+def run_date(logical_date):
+    # Names the run's dt=YYYY-MM-DD partition; runs triggered without a logical date use the current day
+    return (logical_date or pendulum.now()).strftime("%Y-%m-%d")
 
 
-@dag(dag_id="coincap_data", schedule='@daily', start_date=airflow.utils.dates.days_ago(1),
+@dag(dag_id="coincap_data", schedule='@daily', start_date=pendulum.datetime(2025, 1, 1, tz="UTC"),
      description='Data Extract from Coincap API', tags=['Project'], catchup=False, default_args={
         'owner': 'ajay',
         'retries': 2,
-        'retry_delay': duration(seconds=10)}, max_active_runs=1, dagrun_timeout=timedelta(minutes=10))
+        'retry_delay': duration(seconds=10)}, max_active_runs=1, dagrun_timeout=timedelta(minutes=10),
+     # Re-transform objects the ledger already has: airflow dags trigger coincap_data -c '{"force_transform": true}'
+     params={'force_transform': False})
 def coincap_assets():
     @task()
-    def data_extract_to_minio():
-        base_url = 'https://api.coincap.io/v2'
-        folders = ['/assets', '/exchanges', '/markets']
-        for i in folders:
-            url = base_url + i
-            file_name = 'coincap' + i.replace("/", "_")
-            folder = i.replace("/", "")
-            api_data(url, folder, file_name)
+    def data_extract_to_minio(logical_date=None):
+        from coincap import pipeline
+        pipeline.data_extract_to_minio(run_date(logical_date))
 
     @task()
-    def currency_markets_data():
-        currencies = ['bitcoin', 'ethereum', 'ripple', 'bitcoin-cash', 'cardano', 'tether']
-        for i in currencies:
-            base_url = f'https://api.coincap.io/v2/assets/{i}/markets'
-            filename = f"{i}_markets"
-            api_data(base_url, i, filename)
+    def top_currencies(logical_date=None):
+        from coincap import pipeline
+        return pipeline.top_currencies(run_date(logical_date))
+
+    # One mapped task instance per coin, so a slow or failing coin only retries itself
+    @task(max_active_tis_per_dagrun=MAX_ACTIVE_COIN_TASKS)
+    def currency_markets_data(currency, logical_date=None):
+        from coincap import pipeline
+        pipeline.currency_markets_data(currency, run_date(logical_date))
+
+    # A coin that exhausted its retries should not hold back the rest of the run. Bad payloads fail the run
+    # here, without retries, before anything is transformed.
+    @task(trigger_rule='all_done')
+    def validate_data(logical_date=None):
+        from airflow.exceptions import AirflowFailException
+        from coincap import pipeline
+        from coincap.quality import QualityError
+        try:
+            pipeline.validate_data(run_date(logical_date))
+        except QualityError as e:
+            raise AirflowFailException(str(e)) from e
 
     @task()
-    def transform_data():
-        global df
-
-        response1 = s3_client.list_objects_v2(Bucket=minio_bucket, Prefix='raw')
-        for obj in response1.get('Contents', []):
-            # print(obj['Key'])
-            if str(obj['Key']).endswith(f"{date}.json"):
-                file_key = str(obj['Key'])
-                response = s3_client.get_object(Bucket=minio_bucket, Key=file_key)
-                data = response['Body'].read()
-                # Load the JSON data into a Pandas DataFrame
-                try:
-                    df = pd.read_json(BytesIO(data))
-                except ValueError as e:
-                    logging.error(e)
-                info_df = pd.json_normalize(df['data'])
-                result_df = pd.concat([df.drop(columns=['data']), info_df], axis=1)
-                if str(result_df.columns).find('updated') != -1:
-                    result_df['updated'] = pd.to_datetime(result_df['updated'], unit='ms')
-                else:
-                    pass
-
-                fo = io.BytesIO(result_df.to_json().encode('utf-8'))
-                dest_file = file_key.replace("raw", "clean")
-                try:
-                    s3_client.upload_fileobj(fo, minio_bucket, dest_file)
-                    print(f"File uploaded to {dest_file}")
-                except ClientError as e:
-                    logging.error(e)
-            else:
-                print(f"Data files not present for today's date {date} in the minio bucket's raw location.")
+    def transform_data(logical_date=None, params=None):
+        from coincap import pipeline
+        pipeline.transform_data(run_date(logical_date), force=bool((params or {}).get('force_transform')))
 
     @task()
-    def currencies_historic_data():
-        currencies = ['bitcoin', 'ethereum', 'ripple', 'bitcoin-cash', 'cardano', 'tether']
-        for i in currencies:
-            filename = f"{i}_history"
-            prefix = f'history/{i}/{filename}/'
-            if not data_is_available(prefix):
-                raise AirflowSkipException()
-            base_url = f'https://api.coincap.io/v2/assets/{i}/history?interval=d1'
-            i = 'history/' + i
-            api_data(base_url, i, filename)
+    def append_snapshots(logical_date=None):
+        from coincap import pipeline
+        pipeline.append_snapshots(run_date(logical_date))
 
+    @task()
+    def compact_snapshots(logical_date=None):
+        from coincap import pipeline
+        pipeline.compact_snapshots(run_date(logical_date))
+
+    @task(max_active_tis_per_dagrun=MAX_ACTIVE_COIN_TASKS)
+    def currencies_historic_data(currency, logical_date=None):
+        from coincap import pipeline
+        now = logical_date or pendulum.now()
+        pipeline.currencies_historic_data(currency, int(now.timestamp() * 1000))
+
+    # Runs for the coins whose history did load, even when some coin failed
+    @task(trigger_rule='all_done')
+    def derived_metrics(currencies, logical_date=None):
+        from coincap import pipeline
+        pipeline.derived_metrics(currencies, run_date(logical_date))
+
+    # Several gunicorn worker processes; they share the data through coincap.shared. No --preload: every
+    # worker starts its own refresh threads when it creates the app
     dash_app = BashOperator(
         task_id="Run_dash_app",
-        bash_command=f"python /opt/airflow/dags/app.py",
+        bash_command="gunicorn --chdir /opt/airflow/dags --workers ${DASH_WORKERS:-4} --worker-class gthread "
+                     "--threads 4 --bind 0.0.0.0:8050 app:server",
         trigger_rule='none_failed'
     )
 
-
-
-    data_extract_to_minio() >> currency_markets_data() >> transform_data() >> currencies_historic_data() >> dash_app
+    currencies = top_currencies()
+    data_extract_to_minio() >> currencies
+    markets = currency_markets_data.expand(currency=currencies)
+    transformed = transform_data()
+    history = currencies_historic_data.expand(currency=currencies)
+    markets >> validate_data() >> transformed >> history >> derived_metrics(currencies) >> dash_app
+    transformed >> append_snapshots() >> compact_snapshots() >> dash_app
 
 
 coincap_assets()
@@ -0,0 +1,63 @@
+"""Settings and storage for the coincap_data tasks and the dashboards.
+
+Nothing here runs when the DAG file is parsed. Airflow Variables are read and the storage is built the
+first time a task asks for them, then cached for the rest of that process.
+"""
+import os
+import tempfile
+from functools import lru_cache
+
+from coincap.storage import open_storage
+
+MINIO_BUCKET = "bucket1"
+# s3://<bucket> for S3/MinIO, or file://<directory> to keep the whole layout on a local disk
+DEFAULT_STORAGE_URL = f"s3://{MINIO_BUCKET}"
+# Default number of top-ranked coins whose markets and history are fetched; see COINCAP_TOP_N.
+DEFAULT_TOP_N = 10
+# Seconds between a dashboard's checks for a newer clean partition; see COINCAP_REFRESH_SECONDS.
+DEFAULT_REFRESH_SECONDS = 300
+# Where a dashboard started outside Airflow looks when its environment does not say: the docker-compose MinIO
+DASHBOARD_DEFAULTS = {
+    'COINCAP_STORAGE_URL': DEFAULT_STORAGE_URL,
+    'AWS_S3_ENDPOINT': 'http://127.0.0.1:9000',
+    'AWS_ACCESS_KEY_ID': 'minioadmin',
+    'AWS_SECRET_ACCESS_KEY': 'minioadmin',
+    'COINCAP_REFRESH_SECONDS': str(DEFAULT_REFRESH_SECONDS),
+    # History interval the history page opens with (coincap.history.DEFAULT_INTERVAL)
+    'COINCAP_HISTORY_INTERVAL': 'd1',
+    # Local directory where the dashboard's worker processes share the clean files as Arrow (coincap.shared)
+    'COINCAP_CACHE_DIR': os.path.join(tempfile.gettempdir(), 'coincap-dashboard'),
+}
+
+
+@lru_cache(maxsize=None)
+def variable(name, default=None):
+    from airflow.models import Variable
+
+    if default is None:
+        return Variable.get(name)
+    return Variable.get(name, default_var=default)
+
+
+def dashboard_setting(name):
+    # Environment variables of the same names as the Airflow Variables, with the docker-compose defaults
+    return os.environ.get(name, DASHBOARD_DEFAULTS[name])
+
+
+def _storage(setting):
+    url = setting("COINCAP_STORAGE_URL")
+    if not url.startswith('s3://'):
+        return open_storage(url)
+    return open_storage(url, setting("AWS_S3_ENDPOINT"), setting("AWS_ACCESS_KEY_ID"), setting("AWS_SECRET_ACCESS_KEY"))
+
+
+@lru_cache(maxsize=None)
+def storage():
+    """The pipeline's storage, configured by Airflow Variables (COINCAP_STORAGE_URL and the AWS_* ones)."""
+    return _storage(lambda name: variable(name, DEFAULT_STORAGE_URL if name == "COINCAP_STORAGE_URL" else None))
+
+
+@lru_cache(maxsize=None)
+def dashboard_storage():
+    """The dashboards' storage, configured by environment variables of the same names as the Variables."""
+    return _storage(dashboard_setting)
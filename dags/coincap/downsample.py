@@ -0,0 +1,57 @@
+"""Reduce a long time series to about as many points as the chart has pixels.
+
+Both functions take the x and y values as NumPy arrays sorted by x, without NaNs, and return the
+indices of the points to keep, so any other column of the series can be taken with the same indices.
+
+* ``lttb``: Largest-Triangle-Three-Buckets. Keeps the first and last point and, in each bucket in
+  between, the point forming the largest triangle with the point kept before it and the average of
+  the next bucket. The line keeps its visual shape with ``threshold`` points.
+* ``minmax``: the lowest and highest point of each bucket, in order. Cheaper and keeps every spike.
+"""
+import numpy as np
+
+
+def lttb(x, y, threshold):
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    # Bucket edges for the n - 2 points between the first and the last one
+    edges = np.linspace(1, n - 1, threshold - 1).astype('int64')
+    # Each bucket's average, used as the third corner while choosing in the bucket before it
+    sums_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1)
+    counts = np.diff(edges)
+    avg_x = np.append(sums_x / counts, x[-1])
+    avg_y = np.append(sums_y / counts, y[-1])
+
+    keep = np.empty(threshold, dtype='int64')
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Twice the triangle area for every candidate of the bucket at once
+        area = np.abs((x[a] - avg_x[i + 1]) * (y[start:end] - y[a])
+                      - (x[a] - x[start:end]) * (avg_y[i + 1] - y[a]))
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def minmax(x, y, threshold):
+    n = len(x)
+    buckets = threshold // 2
+    if threshold >= n or buckets < 1:
+        return np.arange(n)
+    y = np.asarray(y, dtype='float64')
+    edges = np.linspace(0, n, buckets + 1).astype('int64')[:-1]
+    bucket_y = [np.repeat(reduce.reduceat(y, edges), np.diff(np.append(edges, n)))
+                for reduce in (np.minimum, np.maximum)]
+
+    def first(mask):
+        # Position of the first True of each bucket, without a Python loop over the buckets
+        positions = np.flatnonzero(mask)
+        return positions[np.searchsorted(positions, edges)]
+
+    return np.unique(np.concatenate([first(y == bucket_y[0]), first(y == bucket_y[1])]))
@@ -0,0 +1,75 @@
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_TIMEOUT = 30
+# Largest page the CoinCap API serves; fewer records than this means the last page was reached.
+PAGE_LIMIT = 2000
+MAX_PAGES = 500
+
+
+def make_session(max_workers=DEFAULT_MAX_WORKERS, retries=3, backoff_factor=0.5):
+    """Build a requests session whose connection pool can serve ``max_workers`` threads at once.
+
+    Connections are kept alive between calls, so only the first request to api.coincap.io pays for the
+    TCP/TLS handshake. Rate limiting (429) and transient 5xx answers are retried with backoff.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=max_workers,
+        pool_maxsize=max_workers,
+        max_retries=Retry(total=retries, backoff_factor=backoff_factor,
+                          status_forcelist=(429, 500, 502, 503, 504)),
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def run_concurrently(func, items, max_workers=DEFAULT_MAX_WORKERS):
+    """Call ``func`` on every item with at most ``max_workers`` threads.
+
+    Results come back in the order of ``items``. An exception raised by ``func`` is re-raised once all
+    calls have finished, so one bad item does not leave the others half done.
+    """
+    items = list(items)
+    if max_workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        futures = [pool.submit(func, item) for item in items]
+
+    results = []
+    for item, future in zip(items, futures):
+        error = future.exception()
+        if error is not None:
+            logging.error("%r failed: %s", item, error)
+            raise error
+        results.append(future.result())
+    return results
+
+
+def get_raw(url, session=None, params=None):
+    response = (session or requests).get(url, params=params, timeout=DEFAULT_TIMEOUT)
+    response.raise_for_status()
+    return response.content
+
+
+def iter_pages(url, session=None, limit=PAGE_LIMIT, max_pages=MAX_PAGES):
+    """Yield the raw bodies of a CoinCap list endpoint, walking ``limit``/``offset`` until the data runs out.
+
+    Only one page is held in memory at a time. Each body is decoded once just to count its records,
+    since a short page is the only end-of-data signal the API gives. ``max_pages`` guards against an
+    endpoint that ignores ``offset`` and would otherwise hand back the same full page forever.
+    """
+    for page_number in range(max_pages):
+        body = get_raw(url, session, params={'limit': limit, 'offset': page_number * limit})
+        yield body
+        if len(json.loads(body).get('data') or []) < limit:
+            return
+    logging.warning("%s still had data after %d pages, stopping", url, max_pages)
@@ -0,0 +1,93 @@
+"""Object key layout of the bucket and the per-run manifests.
+
+    raw/dt=2025-01-05/<dataset>/<sha256>.jsonl.gz     payloads first seen on that day
+    raw/dt=2025-01-05/_manifest/<name>.json           what each extract task stored for the run
+    raw/dt=2025-01-05/_quality.json                   data-quality report of the run's payloads
+    raw/_latest/<dataset>.json                        newest payload of a dataset, for deduplication
+    clean/dt=2025-01-05/<dataset>/<filename>.parquet  transformed, typed output
+    clean/dt=2025-01-05/coin_markets/base=<coin>.parquet  markets of each fetched coin, one partition per coin
+    clean/dt=2025-01-05/_ledger.json                  source ETag behind each output, to skip redone work
+
+A manifest entry names the blob a dataset resolved to for the run. That may be a blob from an earlier
+day when the payload did not change. Readers go through the manifests, so they never list the
+bucket beyond the run's own partition.
+"""
+import json
+
+from coincap.storage import NotFound
+
+
+def partition(dt):
+    return f'dt={dt}'
+
+
+def raw_prefix(dt, dataset):
+    return f'raw/{partition(dt)}/{dataset}'
+
+
+def manifest_prefix(dt):
+    return f'raw/{partition(dt)}/_manifest/'
+
+
+def manifest_key(dt, name):
+    return f'{manifest_prefix(dt)}{name}.json'
+
+
+def quality_key(dt):
+    return f'raw/{partition(dt)}/_quality.json'
+
+
+def latest_key(dataset):
+    return f'raw/_latest/{dataset}.json'
+
+
+def clean_key(dt, dataset, filename, ext='parquet'):
+    return f'clean/{partition(dt)}/{dataset}/{filename}.{ext}'
+
+
+def coin_markets_key(dt, coin):
+    return f'clean/{partition(dt)}/coin_markets/base={coin}.parquet'
+
+
+def output_key(dt, entry):
+    """Clean key for a manifest entry; per-coin markets (entries with a ``base``) go to the coin_markets dataset."""
+    if entry.get('base'):
+        return coin_markets_key(dt, entry['base'])
+    return clean_key(dt, entry['dataset'], entry['filename'])
+
+
+def ledger_key(dt):
+    return f'clean/{partition(dt)}/_ledger.json'
+
+
+def read_json(storage, key):
+    """Return the decoded JSON object at ``key``, or None when it does not exist."""
+    try:
+        body = storage.get(key)
+    except NotFound:
+        return None
+    return json.loads(body)
+
+
+def write_json(storage, key, obj):
+    storage.put(key, json.dumps(obj).encode('utf-8'), content_type='application/json')
+
+
+def write_manifest(storage, dt, name, entries):
+    write_json(storage, manifest_key(dt, name), {'dt': dt, 'entries': entries})
+
+
+def read_manifest(storage, dt, name):
+    manifest = read_json(storage, manifest_key(dt, name))
+    return manifest['entries'] if manifest else []
+
+
+def read_manifests(storage, dt):
+    """Return the entries of every manifest written for ``dt``.
+
+    Only the run's ``_manifest/`` prefix is listed, which holds one object per extract task.
+    """
+    entries = []
+    for key in storage.list(manifest_prefix(dt)):
+        entries.extend(read_json(storage, key)['entries'])
+    return entries
@@ -0,0 +1,32 @@
+"""Transform ledger: which source object, at which ETag, each clean output was built from.
+
+The ledger is one JSON object per clean partition (see coincap.layout.ledger_key), mapping an output
+key to ``{'source': key, 'etag': etag}``. An output is only recorded once it has been uploaded. A job
+whose output is already recorded for the source's current ETag is skipped, so task retries and DAG
+reruns only redo the objects that are missing or whose source changed.
+"""
+from coincap.fetch import run_concurrently
+from coincap.layout import ledger_key, read_json, write_json
+
+
+def read_ledger(storage, dt):
+    return (read_json(storage, ledger_key(dt)) or {}).get('outputs', {})
+
+
+def write_ledger(storage, dt, outputs):
+    write_json(storage, ledger_key(dt), {'dt': dt, 'outputs': outputs})
+
+
+def source_etags(storage, keys, max_workers):
+    """Return ``{key: etag}``, with one HEAD request per source object."""
+    keys = list(dict.fromkeys(keys))
+
+    def etag(key):
+        return storage.head(key)['etag']
+
+    return dict(zip(keys, run_concurrently(etag, keys, max_workers)))
+
+
+def pending_jobs(jobs, outputs, etags):
+    """The ``(source, dest)`` jobs whose output is not recorded for the source's current ETag."""
+    return [(source, dest) for source, dest in jobs if outputs.get(dest, {}).get('etag') != etags[source]]
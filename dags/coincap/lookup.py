@@ -0,0 +1,137 @@
+"""Per-coin indexes for the dashboards, built once when their data is loaded.
+
+A callback that filters a whole table on every dropdown change costs time in proportion to the table.
+Here the row numbers of every coin (or exchange) are found once, so a callback looks a coin up in a dict
+and takes just its rows. The tables themselves are memory-mapped from the copy all worker processes
+share (coincap.shared); the indexes hold row numbers and a few totals, never copies of the rows.
+"""
+from functools import lru_cache
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from coincap.layout import coin_markets_key
+from coincap.shared import read_table
+from coincap.storage import NotFound, read_arrow
+from coincap.tables import PLACEHOLDER, ArrowTableSource, empty_source, fill_missing
+
+# Coins whose markets a dashboard process keeps in memory; the least recently selected is dropped first
+MARKETS_CACHE_SIZE = 32
+# Coins and exchanges whose rows a dashboard process keeps ready; each entry holds only that key's rows
+ROWS_CACHE_SIZE = 64
+
+
+class RowIndex:
+    """The row numbers of every non-null value of a column; ``values`` lists them in the order they first appear.
+
+    They are kept as one permutation of the rows sorted by value and the offset of each value in it, so the
+    index costs a few NumPy arrays and a dict of the values, not one object per row. A dictionary (categorical)
+    column is indexed by its own codes.
+    """
+
+    def __init__(self, column):
+        if not pa.types.is_dictionary(column.type):
+            column = pc.dictionary_encode(column)
+        encoded = column.unify_dictionaries().combine_chunks()
+        self._codes = pc.fill_null(encoded.indices, -1).to_numpy()
+        keep = np.flatnonzero(self._codes >= 0)
+        self._order = keep[np.argsort(self._codes[keep], kind='stable')]
+        counts = np.bincount(self._codes[keep], minlength=len(encoded.dictionary))
+        self._offsets = np.concatenate([[0], np.cumsum(counts)])
+        # The first row of a value is the first of its run in the stable sort
+        used = np.flatnonzero(counts)
+        used = used[np.argsort(self._order[self._offsets[used]], kind='stable')]
+        self._groups = {value: group for value, group in zip(encoded.dictionary.take(pa.array(used)).to_pylist(),
+                                                               used.tolist()) if value is not None}
+        self.values = list(self._groups)
+
+    def group(self, value):
+        """The number of ``value`` in the arrays of sums, or None when the column does not have it."""
+        return self._groups.get(value)
+
+    def rows(self, value):
+        """Row numbers of ``value``, or None when the column does not have it."""
+        group = self._groups.get(value)
+        if group is None:
+            return None
+        return self._order[self._offsets[group]:self._offsets[group + 1]]
+
+    def sums(self, column):
+        """Sum of ``column`` over the rows of each value, by group number; NaN where all of them are null."""
+        numbers = pc.cast(column, pa.float64()).to_numpy(zero_copy_only=False)
+        keep = (self._codes >= 0) & ~np.isnan(numbers)
+        size = len(self._offsets) - 1
+        totals = np.bincount(self._codes[keep], weights=numbers[keep], minlength=size).astype('float64')
+        totals[np.bincount(self._codes[keep], minlength=size) == 0] = np.nan
+        return totals
+
+
+def records(table, rows):
+    """DataTable records of the given ``rows`` of ``table``, with missing and empty values shown as N/A."""
+    return fill_missing(table.take(rows).to_pylist())
+
+
+def asset_loader(assets, index, maxsize=ROWS_CACHE_SIZE):
+    """Return ``load(name) -> asset``, everything the assets page shows for a coin, or None for an unknown name.
+
+    ``index`` is the RowIndex of the ``name`` column. An asset holds the coin's table records (with placeholders
+    filled) and its card values: id, symbol, market cap, 24h change and the total 24h volume. Only the volume
+    totals are computed up front; an asset is made from its rows when first asked for and kept in an LRU cache.
+    """
+    totals = index.sums(assets['volumeUsd24Hr'])
+
+    @lru_cache(maxsize=maxsize)
+    def load(name):
+        group = index.group(name)
+        if group is None:
+            return None
+        coin = records(assets, index.rows(name))
+        first = coin[0]
+        total = totals[group]
+        return {'records': coin, 'id': first['id'], 'symbol': first['symbol'], 'marketCapUsd': first['marketCapUsd'],
+                'changePercent24Hr': first['changePercent24Hr'],
+                'volumeUsd24Hr': PLACEHOLDER if np.isnan(total) else float(total)}
+
+    return load
+
+
+def rows_loader(table, index, maxsize=ROWS_CACHE_SIZE):
+    """Return ``load(value) -> ArrowTableSource`` of the rows of ``table`` under ``value`` in ``index`` (RowIndex).
+
+    A value's source is made the first time it is asked for and kept in a bounded LRU cache; it holds only
+    that value's rows. ``load`` returns None for a value the index does not have.
+    """
+    @lru_cache(maxsize=maxsize)
+    def load(value):
+        rows = index.rows(value)
+        if rows is None:
+            return None
+        return ArrowTableSource(table.take(rows), placeholder=PLACEHOLDER)
+
+    return load
+
+
+def markets_loader(storage, dt, maxsize=MARKETS_CACHE_SIZE, cache_dir=None):
+    """Return ``load(coin) -> ArrowTableSource`` for the coin's partition of the ``dt`` coin_markets dataset.
+
+    A coin's partition is read the first time it is asked for and kept in a bounded LRU cache, so
+    nothing is loaded up front and memory stays bounded however many coins are fetched. With a
+    ``cache_dir`` the partition is memory-mapped from the copy all worker processes share. A coin
+    without markets gets an empty source, which is not cached: the transform uploads the markets files
+    next to the assets file, so a partition missing now may be there on the next selection.
+    """
+    @lru_cache(maxsize=maxsize)
+    def read(coin):
+        key = coin_markets_key(dt, coin)
+        if cache_dir:
+            return ArrowTableSource(read_table(storage, key, cache_dir))
+        return ArrowTableSource(read_arrow(storage, key))
+
+    def load(coin):
+        try:
+            return read(coin)
+        except NotFound:
+            return empty_source()
+
+    return load
@@ -0,0 +1,117 @@
+"""Metrics derived from the stored price history, computed for all coins at once.
+
+The history rows of every coin are pivoted into one date x coin price matrix, so each metric is a
+single vectorized pandas/NumPy operation over all coins rather than a loop per coin. Two clean
+files are written per run:
+
+    clean/dt=2025-01-05/metrics/coin_metrics.parquet   one row per (date, coin)
+    clean/dt=2025-01-05/metrics/correlation.parquet    coin x coin correlation of daily log returns
+"""
+import gzip
+import io
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+from coincap.fetch import run_concurrently
+from coincap.history import DEFAULT_INTERVAL, history_prefix
+from coincap.layout import clean_key
+
+WINDOWS = (7, 30, 90)
+# Days of history loaded: the widest window plus enough rows for its values to settle
+LOOKBACK_DAYS = 365
+# Crypto trades every day of the year
+PERIODS_PER_YEAR = 365
+CORRELATION_DAYS = 90
+
+
+def _month_keys(storage, coin, interval, since_month):
+    prefix = f'{history_prefix(coin, interval)}/month='
+    return [key for key in storage.list(prefix) if key[len(prefix):len(prefix) + 7] >= since_month]
+
+
+def _read_rows(storage, coin, key):
+    # (coin, time, priceUsd) for every row of one month file
+    rows = []
+    with gzip.GzipFile(fileobj=io.BytesIO(storage.get(key))) as gz:
+        for line in gz:
+            if line.strip():
+                row = json.loads(line)
+                rows.append((coin, row['time'], row.get('priceUsd')))
+    return rows
+
+
+def load_prices(storage, coins, interval=DEFAULT_INTERVAL, now=None, lookback_days=LOOKBACK_DAYS, max_workers=8):
+    """Daily closing prices as a DataFrame indexed by UTC date, one column per coin."""
+    now = now or datetime.now(tz=timezone.utc)
+    since_month = (now - timedelta(days=lookback_days)).strftime('%Y-%m')
+    keys = run_concurrently(lambda coin: _month_keys(storage, coin, interval, since_month), coins, max_workers)
+    jobs = [(coin, key) for coin, coin_keys in zip(coins, keys) for key in coin_keys]
+    chunks = run_concurrently(lambda job: _read_rows(storage, *job), jobs, max_workers)
+    rows = pd.DataFrame([row for chunk in chunks for row in chunk], columns=['coin', 'time', 'priceUsd'])
+    if rows.empty:
+        return pd.DataFrame(columns=list(coins), dtype='float64')
+    rows['date'] = pd.to_datetime(rows['time'], unit='ms', utc=True).dt.tz_localize(None)
+    rows['priceUsd'] = pd.to_numeric(rows['priceUsd'], errors='coerce')
+    prices = rows.pivot_table(index='date', columns='coin', values='priceUsd', aggfunc='last')
+    # Intraday intervals are reduced to the last price of each day
+    prices = prices.resample('1D').last()
+    start = pd.Timestamp(now.date()) - pd.Timedelta(days=lookback_days)
+    return prices.loc[prices.index >= start].reindex(columns=list(coins))
+
+
+def compute_metrics(prices, windows=WINDOWS):
+    """Per (date, coin) metrics of a daily price matrix, as a long DataFrame."""
+    # Non-positive prices have no logarithm
+    log_prices = np.log(prices.where(prices > 0))
+    log_returns = log_prices.diff()
+    metrics = {'priceUsd': prices, 'logReturn': log_returns,
+               'drawdown': prices / prices.cummax() - 1.0}
+    for window in windows:
+        metrics[f'ma{window}d'] = prices.rolling(window, min_periods=window).mean()
+    for window in windows:
+        # Annualized standard deviation of the daily log returns
+        metrics[f'volatility{window}d'] = (log_returns.rolling(window, min_periods=window).std()
+                                           * np.sqrt(PERIODS_PER_YEAR))
+    frame = pd.concat(metrics, axis=1, names=['metric', 'coin'])
+    long = frame.stack('coin', future_stack=True).reset_index()
+    long = long.rename(columns={long.columns[0]: 'date'})
+    long = long.dropna(subset=['priceUsd'])
+    long['coin'] = long['coin'].astype('category')
+    return long[['date', 'coin'] + list(metrics)]
+
+
+def correlation_matrix(prices, days=CORRELATION_DAYS):
+    """Pairwise correlation of daily log returns over the last ``days`` days."""
+    log_returns = np.log(prices.where(prices > 0)).diff().tail(days)
+    corr = log_returns.corr(min_periods=max(2, days // 3))
+    corr.index.name = 'coin'
+    corr.columns.name = None
+    return corr.reset_index()
+
+
+def write_frame(storage, key, df):
+    fo = io.BytesIO()
+    df.to_parquet(fo, index=False, compression='zstd')
+    storage.put(key, fo.getvalue(), content_type='application/vnd.apache.parquet')
+
+
+def derive_metrics(storage, coins, dt, interval=DEFAULT_INTERVAL, max_workers=8):
+    """Load the history of ``coins``, compute the metrics and write them to the ``dt`` clean partition.
+
+    Returns the keys written, none when there is no price history.
+    """
+    now = datetime.fromisoformat(dt).replace(tzinfo=timezone.utc) + timedelta(days=1)
+    prices = load_prices(storage, coins, interval, now=now, max_workers=max_workers)
+    if prices.empty:
+        # No coins this run (none ranked, or COINCAP_TOP_N is 0) or no stored history for them
+        logging.warning("No %s history for %d coins, no metrics for %s", interval, len(coins), dt)
+        return []
+    metrics_key = clean_key(dt, 'metrics', 'coin_metrics')
+    correlation_key = clean_key(dt, 'metrics', 'correlation')
+    write_frame(storage, metrics_key, compute_metrics(prices))
+    write_frame(storage, correlation_key, correlation_matrix(prices))
+    return [metrics_key, correlation_key]
@@ -0,0 +1,204 @@
+"""Task bodies of the coincap_data DAG.
+
+The DAG file imports this module inside its tasks only, so pandas, boto3 and requests are never
+loaded while the scheduler parses the DAG. ``date`` is the run's logical date formatted as
+``%Y-%m-%d``. It names the run's ``dt=`` partition (see coincap.layout).
+"""
+import heapq
+import json
+import logging
+
+import requests.exceptions as request_exceptions
+from botocore.exceptions import ClientError
+
+from coincap import config
+from coincap.fetch import DEFAULT_MAX_WORKERS, get_raw, iter_pages, make_session, run_concurrently
+from coincap.history import DEFAULT_INTERVAL, load_history
+from coincap.layout import (output_key, quality_key, raw_prefix, read_manifest, read_manifests, write_json,
+                            write_manifest)
+from coincap.ledger import pending_jobs, read_ledger, source_etags, write_ledger
+from coincap.metrics import derive_metrics
+from coincap.quality import QualityError, validate_object
+from coincap.rawstore import iter_page_lines, store_pages
+from coincap.snapshots import KEY_COLUMNS, append_snapshot, closed_months, compact_month
+from coincap.storage import NotFound
+from coincap.transform import PARALLEL_MIN_BYTES, default_workers, transform_objects
+
+BASE_URL = 'https://api.coincap.io/v2'
+
+
+def fetch_concurrency():
+    # Upper bound on parallel API calls per task; also sizes the session's connection pool.
+    return int(config.variable("COINCAP_MAX_WORKERS", DEFAULT_MAX_WORKERS))
+
+
+def api_data_concurrently(jobs, date):
+    # jobs are (url, folder, filename) tuples, fetched in parallel over one pooled session
+    max_workers = fetch_concurrency()
+    with make_session(max_workers) as session:
+        return run_concurrently(lambda job: api_data(*job, date, session=session), jobs, max_workers)
+
+
+# Function to get data from api and load to minio bucket
+# List endpoints are walked page by page. The raw bodies are stored gzip-compressed under their content
+# hash in the run's raw/dt={date}/{folder}/ partition, unless they match the latest stored payload.
+# Returns the manifest entry naming the blob. Set paginate=False for endpoints without limit/offset
+# support. Failures are logged and re-raised so that Airflow retries the task.
+def api_data(url, folder, filename, date, session=None, paginate=True):
+    try:
+        pages = iter_pages(url, session) if paginate else [get_raw(url, session)]
+
+        try:
+            entry = store_pages(config.storage(), folder, raw_prefix(date, folder), pages)
+            entry['filename'] = filename
+            if not entry['uploaded']:
+                print(f"{folder} is unchanged, reusing {entry['key']}")
+            return entry
+        except (ClientError, OSError) as e:
+            logging.error(e)
+            raise
+
+    except request_exceptions.MissingSchema:
+        print(f"{url} appears to be invalid url.")
+        raise
+    except request_exceptions.ConnectionError:
+        print(f"could not connect to {url}")
+        raise
+
+
+def data_extract_to_minio(date):
+    folders = ['/assets', '/exchanges', '/markets']
+    jobs = []
+    for i in folders:
+        url = BASE_URL + i
+        file_name = 'coincap' + i.replace("/", "_")
+        folder = i.replace("/", "")
+        jobs.append((url, folder, file_name))
+    entries = api_data_concurrently(jobs, date)
+    write_manifest(config.storage(), date, 'coincap', entries)
+
+
+def top_currencies(date):
+    # Coin ids of the top-N assets by rank in the day's /assets snapshot
+    top_n = int(config.variable("COINCAP_TOP_N", config.DEFAULT_TOP_N))
+    ranked = []
+    entries = read_manifest(config.storage(), date, 'coincap')
+    assets_key = next(entry['key'] for entry in entries if entry['dataset'] == 'assets')
+    for line in iter_page_lines(config.storage(), assets_key):
+        for asset in json.loads(line).get('data') or []:
+            if asset.get('rank'):
+                ranked.append((int(asset['rank']), asset['id']))
+    currencies = [coin for _, coin in heapq.nsmallest(top_n, ranked)]
+    print(f"Fetching markets and history for {len(currencies)} coins: {currencies}")
+    return currencies
+
+
+def currency_markets_data(currency, date):
+    base_url = f'{BASE_URL}/assets/{currency}/markets'
+    filename = f"{currency}_markets"
+    with make_session(1) as session:
+        entry = api_data(base_url, currency, filename, date, session=session)
+    entry['base'] = currency
+    write_manifest(config.storage(), date, currency, [entry])
+
+
+# Checks every payload listed in the run's manifests and stores the reports next to them. Raises QualityError,
+# before anything is transformed, when a payload has errors.
+def validate_data(date):
+    storage = config.storage()
+    entries = read_manifests(storage, date)
+    if not entries:
+        raise QualityError(f"No raw data was extracted for {date}", [])
+    reports = run_concurrently(lambda entry: validate_object(storage, entry), entries, fetch_concurrency())
+    write_json(storage, quality_key(date), {'dt': date, 'reports': reports})
+    for report in reports:
+        if report['warnings']:
+            logging.warning("%s: %s", report['key'], '; '.join(report['warnings']))
+    failed = [report for report in reports if report['errors']]
+    if failed:
+        details = '\n'.join(f"{report['key']}: {'; '.join(report['errors'])}" for report in failed)
+        raise QualityError(f"{len(failed)} of {len(reports)} payloads failed validation:\n{details}", reports)
+    print(f"{len(reports)} payloads validated, {sum(report['rows'] for report in reports)} rows")
+
+
+# Reads exactly the blobs listed in the run's manifests; nothing else in the bucket is listed.
+# Objects whose output the ledger already records for the source's current ETag are skipped unless force is set.
+def transform_data(date, force=False):
+    storage = config.storage()
+    entries = read_manifests(storage, date)
+    if not entries:
+        print(f"Data files not present for date {date} in the minio bucket's raw location.")
+        return
+    jobs = [(entry['key'], output_key(date, entry)) for entry in entries]
+    etags = source_etags(storage, [source for source, _ in jobs], fetch_concurrency())
+    outputs = read_ledger(storage, date)
+    todo = jobs if force else pending_jobs(jobs, outputs, etags)
+    if not todo:
+        print(f"All {len(jobs)} objects for {date} are already transformed")
+        return
+    sizes = {entry['key']: entry.get('bytes', 0) for entry in entries}
+    total = sum(sizes[source] for source, _ in todo)
+    workers = config.variable("COINCAP_TRANSFORM_WORKERS", '')
+    if workers:
+        workers = int(workers)
+    elif total < PARALLEL_MIN_BYTES:
+        # Starting worker processes costs more than a small day takes; the Variable overrides this
+        workers = 1
+        logging.info("%.1f MiB to transform, under %d MiB: one worker unless COINCAP_TRANSFORM_WORKERS is set",
+                     total / 2 ** 20, PARALLEL_MIN_BYTES // 2 ** 20)
+    else:
+        workers = default_workers()
+    workers = min(workers, len(todo))
+
+    def record(source, dest):
+        outputs[dest] = {'source': source, 'etag': etags[source]}
+
+    try:
+        written = transform_objects(storage, todo, workers=workers,
+                                    io_threads=fetch_concurrency(), on_written=record)
+    finally:
+        write_ledger(storage, date, outputs)
+    print(f"{len(written)} of {len(todo)} objects transformed with {workers} workers, "
+          f"{len(jobs) - len(todo)} already done")
+
+
+# The day's clean assets, exchanges and markets files become the dt={date} rows of the snapshot time series
+def append_snapshots(date):
+    storage = config.storage()
+    for entry in read_manifest(storage, date, 'coincap'):
+        if entry['dataset'] not in KEY_COLUMNS:
+            continue
+        source = output_key(date, entry)
+        try:
+            key = append_snapshot(storage, entry['dataset'], date, source)
+        except NotFound as e:
+            # The transform skips payloads it cannot parse; there is then nothing to append
+            logging.error("Could not append %s: %s", source, e)
+            continue
+        print(f"Snapshot appended to {key}")
+
+
+# Merges the daily snapshot files of every month before the run's month into one file per month
+def compact_snapshots(date):
+    storage = config.storage()
+    for dataset in KEY_COLUMNS:
+        for month in closed_months(storage, dataset, date):
+            merged = compact_month(storage, dataset, month, fetch_concurrency())
+            print(f"{dataset} {month}: {len(merged)} daily files compacted")
+
+
+# Incremental: only rows newer than the coin's watermark are requested and appended
+def currencies_historic_data(currency, now_ms):
+    interval = config.variable("COINCAP_HISTORY_INTERVAL", DEFAULT_INTERVAL)
+    base_url = f'{BASE_URL}/assets/{currency}/history'
+    with make_session(1) as session:
+        added = load_history(config.storage(), base_url, currency, interval,
+                             now_ms=now_ms, session=session)
+    print(f"{added} new {interval} history rows stored for {currency}")
+
+
+# Returns, volatility, drawdown, moving averages and correlations of all the run's coins, in one pass
+def derived_metrics(currencies, date):
+    interval = config.variable("COINCAP_HISTORY_INTERVAL", DEFAULT_INTERVAL)
+    for key in derive_metrics(config.storage(), list(currencies), date, interval, fetch_concurrency()):
+        print(f"Metrics written to {key}")
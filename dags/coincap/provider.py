@@ -0,0 +1,107 @@
+"""Dashboard data that follows the newest clean partition without blocking the callbacks.
+
+A ``LatestPartition`` resolves the most recent ``clean/dt=<date>/`` file of a dataset, loads it and
+prepares everything the page needs (indexes, records, columns) into one snapshot dict. A background
+thread checks every ``interval`` seconds for a newer partition or a rewritten file and builds a new
+snapshot when it finds one. The snapshot is swapped in with a single assignment, so a callback that
+calls ``current()`` once gets a complete, consistent view and never waits for the storage. The file is
+loaded as an Arrow table; with a ``cache_dir`` it is memory-mapped from the copy that all worker processes
+share (coincap.shared), so a worker holds only what ``build`` derives from it.
+"""
+import logging
+import threading
+import time
+from datetime import date, timedelta
+
+import pyarrow as pa
+
+from coincap.config import DEFAULT_REFRESH_SECONDS
+from coincap.layout import clean_key
+from coincap.shared import read_table
+from coincap.storage import NotFound, read_arrow
+
+# How far back a dashboard looks for a partition before it shows an empty page
+MAX_AGE_DAYS = 30
+
+
+def latest_partition(storage, dataset, filename, today=None, max_age_days=MAX_AGE_DAYS):
+    """``(dt, key, etag)`` of the newest partition that has the dataset's file, or ``(None, None, None)``."""
+    today = today or date.today()
+    for days in range(max_age_days + 1):
+        dt = (today - timedelta(days=days)).isoformat()
+        key = clean_key(dt, dataset, filename)
+        try:
+            return dt, key, storage.head(key)['etag']
+        except NotFound:
+            continue
+    return None, None, None
+
+
+class LatestPartition:
+    """The newest ``clean/dt=*/<dataset>/<filename>.parquet`` of a dataset, kept in memory and refreshed.
+
+    ``build(table, dt)`` turns the loaded Arrow table into the dict of values the page uses; it gets an
+    empty table with ``columns`` (and ``dt`` None) while no partition can be loaded. Keep the table itself
+    in the dict rather than copies of its rows: the rows stay in the shared memory map.
+    """
+
+    def __init__(self, storage, dataset, filename, build, columns, interval=DEFAULT_REFRESH_SECONDS,
+                 cache_dir=None):
+        self.storage = storage
+        self.cache_dir = cache_dir
+        self.dataset = dataset
+        self.filename = filename
+        self.build = build
+        self.columns = columns
+        self.interval = interval
+        self._snapshot = self._make(pa.table({c: pa.array([], pa.string()) for c in columns}), None, None, None)
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def _make(self, table, dt, key, etag):
+        return dict(self.build(table, dt), dt=dt, key=key, etag=etag, loaded_at=time.time())
+
+    def current(self):
+        """The latest complete snapshot. Read it once per callback and use only that dict."""
+        return self._snapshot
+
+    def refresh(self):
+        """Load the newest partition if it differs from the one in memory. Returns True when swapped."""
+        with self._lock:
+            try:
+                dt, key, etag = latest_partition(self.storage, self.dataset, self.filename)
+                snapshot = self._snapshot
+                if (key, etag) == (snapshot['key'], snapshot['etag']):
+                    return False
+                if key is None:
+                    logging.warning("No %s partition in the last %d days", self.dataset, MAX_AGE_DAYS)
+                    return False
+                fresh = self._make(self._read(key, etag), dt, key, etag)
+            except Exception as e:
+                # The page keeps serving what it has; the next check tries again
+                logging.error("Could not refresh %s: %s", self.dataset, e)
+                return False
+            self._snapshot = fresh
+        logging.info("%s loaded from %s", self.dataset, key)
+        return True
+
+    def _read(self, key, etag):
+        if self.cache_dir:
+            return read_table(self.storage, key, self.cache_dir, etag)
+        return read_arrow(self.storage, key)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.refresh()
+
+    def start(self):
+        """Load the newest partition now, then keep checking in a daemon thread. Returns self."""
+        if self._thread is None:
+            self.refresh()
+            self._thread = threading.Thread(target=self._run, name=f'refresh-{self.dataset}', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
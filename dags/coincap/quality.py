@@ -0,0 +1,134 @@
+"""Data-quality checks on the raw payloads, run before anything is transformed.
+
+Each raw blob is parsed in batches (see coincap.stream) and every check is a column-wise pandas
+operation over the batch, so the cost grows linearly with the number of rows and memory with the
+batch size. A blob gets a compact report:
+
+    {'key': ..., 'dataset': 'markets', 'rows': 4500, 'missing_columns': [], 'null_ratio': {...},
+     'parse_failures': {}, 'negative_prices': {}, 'duplicate_ids': 0, 'stale_rows': 0,
+     'errors': [], 'warnings': []}
+
+Any error fails the run before the transform spends I/O on bad data.
+"""
+import numpy as np
+import pandas as pd
+
+from coincap.rawstore import iter_page_lines
+from coincap.schema import FLOAT_COLUMNS, INT_COLUMNS
+from coincap.stream import iter_batches
+
+# Columns every payload of a kind must have; per-coin markets are checked as 'markets'
+REQUIRED_COLUMNS = {
+    'assets': ['id', 'rank', 'symbol', 'name', 'priceUsd', 'marketCapUsd', 'volumeUsd24Hr', 'changePercent24Hr'],
+    'exchanges': ['exchangeId', 'name', 'rank', 'percentTotalVolume', 'volumeUsd'],
+    'markets': ['exchangeId', 'baseId', 'quoteId', 'baseSymbol', 'quoteSymbol', 'priceUsd'],
+}
+# Columns that identify a row; two rows with the same values are duplicates
+ID_COLUMNS = {'assets': ['id'], 'exchanges': ['exchangeId'], 'markets': ['exchangeId', 'baseId', 'quoteId']}
+PRICE_COLUMNS = ['priceUsd', 'priceQuote']
+NUMERIC_COLUMNS = FLOAT_COLUMNS | INT_COLUMNS | {'updated'}
+
+MAX_NULL_RATIO = 0.5
+MAX_PARSE_FAILURE_RATIO = 0.01
+# A row is stale when its ``updated`` is this much older than the time the response was served
+STALE_AFTER = pd.Timedelta(hours=24)
+MAX_STALE_RATIO = 0.5
+# Offset pagination can repeat a row across a page boundary when ranks shift between two page requests. A few
+# such repeats are expected and the transform keeps the first copy; more than this means the payload is broken.
+MAX_DUPLICATE_RATIO = 0.01
+
+
+class QualityError(ValueError):
+    """Raised when a payload fails its checks. ``reports`` holds the report of every payload checked."""
+
+    def __init__(self, message, reports):
+        super().__init__(message)
+        self.reports = reports
+
+
+def kind_of(entry):
+    # A manifest entry with a ``base`` holds one coin's markets
+    return 'markets' if entry.get('base') else entry['dataset']
+
+
+def id_columns_for(clean_key):
+    # clean/dt=<date>/<dataset>/...; per-coin markets are written to the coin_markets dataset
+    parts = clean_key.split('/')
+    dataset = parts[2] if len(parts) > 3 else None
+    return ID_COLUMNS.get('markets' if dataset == 'coin_markets' else dataset, [])
+
+
+def id_hashes(df, id_columns):
+    # One 64-bit hash per row of the raw id values
+    return pd.util.hash_pandas_object(df[id_columns].astype(str), index=False).to_numpy()
+
+
+def profile(batches, kind):
+    """Accumulate the check counters over ``batches`` of raw records (all values as the API sent them)."""
+    required = REQUIRED_COLUMNS.get(kind, [])
+    id_columns = ID_COLUMNS.get(kind, [])
+    rows, columns = 0, set()
+    nulls, failures, negatives = pd.Series(dtype='int64'), {}, {}
+    hashes, stale = [], 0
+    for df in batches:
+        rows += len(df)
+        columns.update(df.columns)
+        nulls = nulls.add(df.isna().sum(), fill_value=0)
+        for column in NUMERIC_COLUMNS.intersection(df.columns):
+            values = df[column]
+            parsed = pd.to_numeric(values, errors='coerce')
+            failures[column] = failures.get(column, 0) + int((parsed.isna() & values.notna()).sum())
+            if column in PRICE_COLUMNS:
+                negatives[column] = negatives.get(column, 0) + int((parsed < 0).sum())
+        if id_columns and set(id_columns) <= set(df.columns):
+            hashes.append(id_hashes(df, id_columns))
+        if 'updated' in df.columns:
+            updated = pd.to_datetime(pd.to_numeric(df['updated'], errors='coerce'), unit='ms')
+            stale += int(((df['timestamp'] - updated) > STALE_AFTER).sum())
+
+    duplicates = int(pd.Series(np.concatenate(hashes)).duplicated().sum()) if hashes else 0
+    return {
+        'rows': rows,
+        'missing_columns': [column for column in required if column not in columns],
+        'null_ratio': {column: round(nulls.get(column, rows) / rows, 4) if rows else 0.0
+                       for column in required if column in columns},
+        'parse_failures': {column: count for column, count in failures.items() if count},
+        'negative_prices': {column: count for column, count in negatives.items() if count},
+        'duplicate_ids': duplicates,
+        'stale_rows': stale,
+    }
+
+
+def judge(report):
+    """Fill ``errors`` and ``warnings`` of a profiled report. Returns the report."""
+    errors, warnings = [], []
+    rows = report['rows']
+    if not rows:
+        # An empty page is a valid answer (a coin without markets); its columns cannot be checked
+        report['errors'], report['warnings'] = errors, ["no rows"]
+        return report
+    if report['missing_columns']:
+        errors.append(f"missing columns {report['missing_columns']}")
+    for column, ratio in report['null_ratio'].items():
+        if ratio > MAX_NULL_RATIO:
+            errors.append(f"{column} is null in {ratio:.0%} of rows")
+    for column, count in report['parse_failures'].items():
+        (errors if count / rows > MAX_PARSE_FAILURE_RATIO else warnings).append(f"{count} unparsable {column} values")
+    for column, count in report['negative_prices'].items():
+        errors.append(f"{count} negative {column} values")
+    if report['duplicate_ids']:
+        (errors if report['duplicate_ids'] / rows > MAX_DUPLICATE_RATIO else warnings).append(
+            f"{report['duplicate_ids']} duplicate ids")
+    if report['stale_rows']:
+        stale_ratio = report['stale_rows'] / rows
+        (errors if stale_ratio > MAX_STALE_RATIO else warnings).append(
+            f"{report['stale_rows']} rows not updated for over {STALE_AFTER}")
+    report['errors'], report['warnings'] = errors, warnings
+    return report
+
+
+def validate_object(storage, entry):
+    """Check the raw blob of a manifest entry and return its report."""
+    kind = kind_of(entry)
+    report = profile(iter_batches(iter_page_lines(storage, entry['key'])), kind)
+    return judge(dict({'key': entry['key'], 'dataset': kind}, **report))
@@ -0,0 +1,72 @@
+"""Compressed, deduplicated storage for raw API responses.
+
+Response bodies are stored exactly as the API sent them, one page per line, gzip-compressed, under the
+SHA-256 of the payload. Each dataset remembers its latest payload in ``raw/_latest/<dataset>.json``.
+When a new payload hashes the same, nothing is uploaded and the run reuses the stored blob.
+"""
+import gzip
+import hashlib
+import re
+import tempfile
+
+from coincap.layout import latest_key, read_json, write_json
+
+RAW_SUFFIX = '.jsonl.gz'
+# Payloads up to this size are compressed in memory; larger ones spill to a temporary file.
+SPOOL_SIZE = 16 * 1024 * 1024
+# Every CoinCap response ends with the time it was served, which would make every payload unique.
+_ENVELOPE_TIMESTAMP = re.compile(rb',\s*"timestamp"\s*:\s*\d+\s*}\s*$')
+
+
+def encode_pages(pages):
+    """Gzip raw page bodies, one per line, into a spooled temporary file.
+
+    JSON strings cannot hold a literal newline, so dropping the newline bytes from a body leaves the
+    document intact. Returns the rewound file, the SHA-256 of the payload (ignoring the envelope
+    timestamp) and the uncompressed size.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+    with gzip.GzipFile(fileobj=spool, mode='wb', compresslevel=6, mtime=0) as gz:
+        for body in pages:
+            line = body.replace(b'\r', b'').replace(b'\n', b'')
+            gz.write(line + b'\n')
+            digest.update(_ENVELOPE_TIMESTAMP.sub(b'}', line) + b'\n')
+            size += len(line) + 1
+    spool.seek(0)
+    return spool, digest.hexdigest(), size
+
+
+def store_pages(storage, dataset, prefix, pages):
+    """Store ``pages`` as ``prefix/<sha256>.jsonl.gz`` unless they match the dataset's latest payload.
+
+    Returns the manifest entry for the payload: the blob key, its hash and sizes, and whether it was
+    uploaded or reused.
+    """
+    spool, sha256, size = encode_pages(pages)
+    with spool:
+        compressed = spool.seek(0, 2)
+        spool.seek(0)
+        latest = read_json(storage, latest_key(dataset))
+        uploaded = not (latest and latest['sha256'] == sha256 and storage.exists(latest['key']))
+        blob_key = f'{prefix}/{sha256}{RAW_SUFFIX}' if uploaded else latest['key']
+        if uploaded:
+            storage.put(blob_key, spool, content_type='application/gzip',
+                        metadata={'sha256': sha256, 'raw-bytes': str(size)})
+            write_json(storage, latest_key(dataset), {'key': blob_key, 'sha256': sha256})
+
+    return {'dataset': dataset, 'key': blob_key, 'sha256': sha256, 'bytes': size,
+            'compressed_bytes': compressed, 'uploaded': uploaded}
+
+
+def iter_page_lines(storage, key):
+    """Yield the raw page bodies of a stored blob, decompressing as the object streams in."""
+    body = storage.stream(key)
+    try:
+        with gzip.GzipFile(fileobj=body, mode='rb') as gz:
+            for line in gz:
+                if line.strip():
+                    yield line
+    finally:
+        body.close()
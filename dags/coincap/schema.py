@@ -0,0 +1,85 @@
+"""Column types of the clean layer.
+
+The API sends every number as a string. Clean frames get explicit dtypes before they are written as
+Parquet, so readers load typed columns and can select only the columns they need. Prices, volumes and
+supplies become float64. Counts and ranks become nullable integers. Ids, symbols and exchange names
+become categoricals, and ``updated`` becomes a timestamp.
+"""
+import json
+import math
+
+import pandas as pd
+
+FLOAT_COLUMNS = {
+    'priceUsd', 'priceQuote', 'marketCapUsd', 'volumeUsd', 'volumeUsd24Hr', 'vwap24Hr',
+    'changePercent24Hr', 'percentTotalVolume', 'percentExchangeVolume', 'supply', 'maxSupply',
+    'circulatingSupply',
+}
+INT_COLUMNS = {'rank', 'tradingPairs', 'tradesCount24Hr'}
+CATEGORY_COLUMNS = {
+    'id', 'symbol', 'name', 'exchangeId', 'baseId', 'baseSymbol', 'quoteId', 'quoteSymbol',
+}
+# Epoch milliseconds in the API payloads
+TIMESTAMP_COLUMNS = {'updated'}
+
+
+def apply_schema(df):
+    """Cast the known columns of ``df`` in place and return it; unknown columns are left as they are."""
+    for column in df.columns:
+        if column in FLOAT_COLUMNS:
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype('float64')
+        elif column in INT_COLUMNS:
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype('Int64')
+        elif column in CATEGORY_COLUMNS:
+            df[column] = df[column].astype('category')
+        elif column in TIMESTAMP_COLUMNS:
+            df[column] = pd.to_datetime(pd.to_numeric(df[column], errors='coerce'), unit='ms')
+    return df
+
+
+def arrow_schema(df):
+    """Arrow schema for a file written in batches, taken from the first typed batch ``df``.
+
+    Every batch has to match it exactly, so the types that pandas picks per batch are pinned down:
+    categoricals use int32 codes whatever their cardinality, and a column that is all null in the
+    first batch is stored as a string.
+    """
+    import pyarrow as pa
+
+    inferred = pa.Schema.from_pandas(df, preserve_index=False)
+    fields = []
+    for field in inferred:
+        if pa.types.is_dictionary(field.type):
+            field = field.with_type(pa.dictionary(pa.int32(), pa.string()))
+        elif pa.types.is_null(field.type):
+            field = field.with_type(pa.string())
+        fields.append(field)
+    # Keep the pandas metadata so readers get the nullable and categorical dtypes back
+    return pa.schema(fields, metadata=inferred.metadata)
+
+
+def _text(value):
+    # JSON text of a value in a column stored as strings: true, 1.5, ...; missing values stay null
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return json.dumps(value)
+
+
+def conform(df, schema):
+    """Arrow table of the batch ``df`` in the file's ``schema`` (see arrow_schema).
+
+    A column that was all null in the first batch is stored as a string, but a later batch may hold
+    booleans or numbers in it; those values are written as their JSON text instead of failing the file.
+    """
+    import pyarrow as pa
+
+    try:
+        return pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+    except (pa.ArrowTypeError, pa.ArrowInvalid):
+        df = df.copy()
+        for field in schema:
+            if pa.types.is_string(field.type):
+                df[field.name] = df[field.name].astype(object).map(_text)
+        return pa.Table.from_pandas(df, schema=schema, preserve_index=False)
@@ -0,0 +1,150 @@
+"""Price and volume series for the history page, read from the stored history and downsampled.
+
+A chart shows at most one point per pixel, so a series is cut to the selected range and reduced to
+the chart's width (see coincap.downsample) before it leaves the server. Results are cached per
+(coin, interval, range, width) and the coin's watermark: the cache entry changes when new rows are
+stored. Parsed month files are cached too. Months before the watermark's month are never rewritten
+(see coincap.history), so only the newest month is read again after a run. The watermarks and the
+list of coins are themselves re-read only on the dashboards' refresh schedule.
+"""
+import gzip
+import io
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.json as pj
+
+from coincap.config import DEFAULT_REFRESH_SECONDS
+from coincap.downsample import lttb, minmax
+from coincap.fetch import run_concurrently
+from coincap.history import DAY_MS, INTERVAL_MS, history_prefix, month_key, read_watermark
+from coincap.snapshots import scan
+from coincap.storage import NotFound
+
+# Selectable ranges in days back from the newest stored row; None is everything
+RANGES = {'7d': 7, '30d': 30, '90d': 90, '1y': 365, '3y': 3 * 365, 'all': None}
+SERIES_CACHE_SIZE = 128
+MONTH_CACHE_SIZE = 512
+WATERMARK_CACHE_SIZE = 1024
+_MONTH_SCHEMA = pa.schema([('time', pa.int64()), ('priceUsd', pa.string())])
+
+
+def coins_with_history(storage, interval):
+    prefix = history_prefix('', interval)
+    return sorted(key[len(prefix):].split('/', 1)[0] for key in storage.list(prefix)
+                  if key.endswith('/_watermark.json'))
+
+
+def _month(time_ms):
+    return datetime.fromtimestamp(time_ms / 1000, tz=timezone.utc).strftime('%Y-%m')
+
+
+def _day(time_ms):
+    return datetime.fromtimestamp(time_ms / 1000, tz=timezone.utc).strftime('%Y-%m-%d')
+
+
+def months_between(start_ms, end_ms):
+    months, year, month = [], *map(int, _month(start_ms).split('-'))
+    last = _month(end_ms)
+    while f'{year:04d}-{month:02d}' <= last:
+        months.append(f'{year:04d}-{month:02d}')
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def parse_month(body):
+    """``(times, prices)`` NumPy arrays of one gzipped JSON-lines month file, rows without a price dropped."""
+    table = pj.read_json(io.BytesIO(gzip.decompress(body)), parse_options=pj.ParseOptions(
+        explicit_schema=_MONTH_SCHEMA, unexpected_field_behavior='ignore'))
+    prices = pc.cast(table['priceUsd'], pa.float64())
+    valid = pc.is_valid(prices)
+    return (table['time'].filter(valid).to_numpy(), prices.filter(valid).to_numpy())
+
+
+def downsample(times, values, width, method='lttb'):
+    keep = (lttb if method == 'lttb' else minmax)(times, values, width)
+    return times[keep], values[keep]
+
+
+class HistoryLoader:
+    """Series for the history page: ``load(coin, interval, range_name, width) -> series``, ``coins(interval)``
+    and ``intervals()``.
+
+    ``series`` is ``{'time': ms array, 'priceUsd': array, 'volumeUsd24Hr': (dates, volumes), 'points': n}``
+    with at most ``width`` price points; ``points`` is the number of rows in the range before downsampling.
+    The coins with history and each coin's watermark are read at most once every ``ttl`` seconds, the
+    dashboards' refresh interval, so page loads and callbacks in between neither list nor GET the bucket.
+    """
+
+    def __init__(self, storage, maxsize=SERIES_CACHE_SIZE, max_workers=8, ttl=DEFAULT_REFRESH_SECONDS):
+        self.storage = storage
+        self.max_workers = max_workers
+        self.ttl = ttl
+        # Entries are keyed by the ttl period they were read in; older periods age out of the LRU
+        self._coins = lru_cache(maxsize=16)(self._list_coins)
+        self._watermark = lru_cache(maxsize=WATERMARK_CACHE_SIZE)(self._read_watermark)
+        self._month = lru_cache(maxsize=MONTH_CACHE_SIZE)(self._read_month)
+        self._series = lru_cache(maxsize=maxsize)(self._select)
+
+    def _period(self):
+        return int(time.monotonic() // self.ttl)
+
+    def _list_coins(self, interval, period):
+        return coins_with_history(self.storage, interval)
+
+    def _read_watermark(self, coin, interval, period):
+        return read_watermark(self.storage, coin, interval)
+
+    def _read_month(self, coin, interval, name, version):
+        # version is the watermark for the month still being written and None for closed months
+        try:
+            return parse_month(self.storage.get(month_key(coin, interval, name)))
+        except NotFound:
+            return np.empty(0, 'int64'), np.empty(0, 'float64')
+
+    def _select(self, coin, interval, range_name, width, watermark):
+        days = RANGES[range_name]
+        start = watermark - days * DAY_MS if days else 0
+        if days is None:
+            prefix = f'{history_prefix(coin, interval)}/month='
+            names = [key[len(prefix):len(prefix) + 7] for key in self.storage.list(prefix)]
+        else:
+            names = months_between(start, watermark)
+        newest = _month(watermark)
+        parts = run_concurrently(lambda name: self._month(coin, interval, name, watermark if name >= newest else None),
+                                 names, self.max_workers)
+        times = np.concatenate([part[0] for part in parts]) if parts else np.empty(0, 'int64')
+        prices = np.concatenate([part[1] for part in parts]) if parts else np.empty(0, 'float64')
+        in_range = times >= start
+        times, prices = times[in_range], prices[in_range]
+        points = len(times)
+        times, prices = downsample(times, prices, width)
+        return {'time': times, 'priceUsd': prices, 'volumeUsd24Hr': self._volumes(coin, start, watermark),
+                'points': points}
+
+    def _volumes(self, coin, start, end):
+        # Daily 24h volume from the assets snapshots; one row per day, few enough to send as they are
+        table = scan(self.storage, 'assets', _day(start), _day(end), keys=[coin],
+                     columns=['dt', 'id', 'volumeUsd24Hr'])
+        if table.num_rows == 0:
+            return np.empty(0, 'datetime64[D]'), np.empty(0, 'float64')
+        table = table.sort_by('dt')
+        return (table['dt'].to_numpy().astype('datetime64[D]'),
+                pc.cast(table['volumeUsd24Hr'], pa.float64()).to_numpy(zero_copy_only=False))
+
+    def coins(self, interval):
+        return self._coins(interval, self._period())
+
+    def intervals(self):
+        """The intervals some coin has history for, shortest first."""
+        return [interval for interval in INTERVAL_MS if self.coins(interval)]
+
+    def load(self, coin, interval, range_name, width):
+        watermark = self._watermark(coin, interval, self._period())
+        if watermark is None:
+            return None
+        return self._series(coin, interval, range_name, width, watermark)
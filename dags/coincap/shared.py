@@ -0,0 +1,91 @@
+"""Clean files shared by all the worker processes of a dashboard through memory-mapped Arrow files.
+
+Under gunicorn every worker imports the pages and loads the data itself. Here a clean Parquet file is
+converted once per version (its ETag) into an uncompressed Arrow IPC file on local disk:
+
+    <cache dir>/clean/dt=2025-01-05/assets/coincap_assets.parquet.<etag>.arrow
+
+The first process to need it writes it under a file lock. Every process then memory-maps it, and the
+tables it reads point into the operating system's page cache, which all workers share, instead of
+each worker holding its own copy. Older versions of a file, and the same dataset of older days, are
+removed when a newer one is written, so the cache holds about one day of data.
+"""
+import os
+import shutil
+from contextlib import contextmanager
+from pathlib import Path
+
+import pyarrow as pa
+
+from coincap.storage import read_arrow
+
+try:
+    import fcntl
+except ImportError:
+    # Without file locks two processes may both convert a file; the atomic rename keeps that harmless
+    fcntl = None
+
+
+@contextmanager
+def _locked(path):
+    with open(path, 'a') as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def cache_path(cache_dir, key, etag):
+    return Path(cache_dir) / f'{key}.{etag}.arrow'
+
+
+def _prune_days(cache_dir, key):
+    # clean/dt=<day>/<dataset>/<file>: the dataset's directories of earlier days go
+    parts = Path(key).parts
+    at = next((i for i, part in enumerate(parts) if part.startswith('dt=')), None)
+    if at is None or at + 2 >= len(parts):
+        return
+    dataset = Path(*parts[at + 1:-1])
+    for day in Path(cache_dir).joinpath(*parts[:at]).glob('dt=*'):
+        if day.name < parts[at]:
+            shutil.rmtree(day / dataset, ignore_errors=True)
+            try:
+                # Only once no other dataset is left in it
+                day.rmdir()
+            except OSError:
+                pass
+
+
+def publish(storage, key, etag, cache_dir):
+    """Write the Arrow IPC copy of ``key`` at version ``etag`` unless it exists. Returns its path."""
+    path = cache_path(cache_dir, key, etag)
+    if path.exists():
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _locked(path.parent / '.lock'):
+        if not path.exists():
+            table = read_arrow(storage, key)
+            tmp = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+            with pa.OSFile(str(tmp), 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            os.replace(tmp, path)
+            # Older versions go; a process still mapping one keeps it readable until it lets go
+            for old in path.parent.glob(f'{Path(key).name}.*.arrow'):
+                if old != path:
+                    old.unlink(missing_ok=True)
+            _prune_days(cache_dir, key)
+    return path
+
+
+def open_table(path):
+    # Zero-copy: the table's buffers are slices of the memory map
+    return pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+
+
+def read_table(storage, key, cache_dir, etag=None):
+    """The clean file at ``key`` as an Arrow table memory-mapped from the shared cache. Raises NotFound."""
+    etag = etag or storage.head(key)['etag']
+    return open_table(publish(storage, key, etag, cache_dir))
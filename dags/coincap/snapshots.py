@@ -0,0 +1,179 @@
+"""Append-only time series of the daily assets, exchanges and markets snapshots.
+
+Every run appends its clean snapshot of a dataset as one Parquet file with a ``dt`` column. Closed
+months are then compacted into a single file:
+
+    snapshots/dataset=assets/month=2025-01/day=2025-01-05.parquet   one run's snapshot
+    snapshots/dataset=assets/month=2024-12/compacted.parquet        a whole month
+    snapshots/dataset=assets/_index.json                            live files and their min/max stats
+
+Rows are sorted by the dataset's key column (the coin or exchange id) and then by ``dt``, so the
+Parquet row-group statistics are tight too. Readers go through the index, which keeps per-file min/max
+of ``dt`` and of the key column. A date-range or coin filter therefore skips whole files without
+fetching them, and a multi-day question is answered by one scan rather than one file per day.
+"""
+import io
+import logging
+from datetime import date
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from coincap.fetch import run_concurrently
+from coincap.layout import read_json, write_json
+
+# Dataset -> column that identifies a coin or exchange within it
+KEY_COLUMNS = {'assets': 'id', 'exchanges': 'exchangeId', 'markets': 'baseId'}
+ROW_GROUP_SIZE = 64 * 1024
+
+
+def snapshot_prefix(dataset):
+    return f'snapshots/dataset={dataset}'
+
+
+def daily_key(dataset, dt):
+    return f'{snapshot_prefix(dataset)}/month={dt[:7]}/day={dt}.parquet'
+
+
+def compacted_key(dataset, month):
+    return f'{snapshot_prefix(dataset)}/month={month}/compacted.parquet'
+
+
+def index_key(dataset):
+    return f'{snapshot_prefix(dataset)}/_index.json'
+
+
+def read_index(storage, dataset):
+    return (read_json(storage, index_key(dataset)) or {}).get('files', {})
+
+
+def write_index(storage, dataset, files):
+    write_json(storage, index_key(dataset), {'dataset': dataset, 'files': files})
+
+
+def _plain(table):
+    # Categoricals are stored as plain strings: they can be sorted, and dictionaries of different days concatenate
+    fields = [field.with_type(field.type.value_type) if pa.types.is_dictionary(field.type) else field
+              for field in table.schema]
+    return table.cast(pa.schema(fields)).replace_schema_metadata(None)
+
+
+def _stats(table, key_column):
+    # min/max as JSON-friendly strings; None when the column is missing or all null
+    low, high = {}, {}
+    for column in ('dt', key_column):
+        if column in table.column_names:
+            bounds = pc.min_max(table[column])
+            low[column] = None if bounds['min'].as_py() is None else str(bounds['min'].as_py())
+            high[column] = None if bounds['max'].as_py() is None else str(bounds['max'].as_py())
+    return low, high
+
+
+def _put_table(storage, key, table, dataset):
+    key_column = KEY_COLUMNS[dataset]
+    sort_keys = [(column, 'ascending') for column in (key_column, 'dt') if column in table.column_names]
+    table = table.sort_by(sort_keys)
+    fo = io.BytesIO()
+    pq.write_table(table, fo, compression='zstd', row_group_size=ROW_GROUP_SIZE)
+    body = fo.getvalue()
+    storage.put(key, body, content_type='application/vnd.apache.parquet')
+    low, high = _stats(table, key_column)
+    return {'rows': table.num_rows, 'bytes': len(body), 'min': low, 'max': high}
+
+
+def _get_table(storage, key, columns=None, filters=None):
+    return pq.read_table(pa.BufferReader(pa.py_buffer(storage.buffer(key))), columns=columns, filters=filters)
+
+
+def append_snapshot(storage, dataset, dt, source_key):
+    """Append the clean Parquet file ``source_key`` as the ``dt`` snapshot of ``dataset``.
+
+    Appending the same day again replaces that day's file, so retries and reruns do not duplicate rows.
+    """
+    table = _plain(_get_table(storage, source_key))
+    table = table.append_column('dt', pa.array([date.fromisoformat(dt)] * table.num_rows, pa.date32()))
+    key = daily_key(dataset, dt)
+    entry = _put_table(storage, key, table, dataset)
+    files = read_index(storage, dataset)
+    files[key] = dict(entry, kind='daily', month=dt[:7])
+    write_index(storage, dataset, files)
+    return key
+
+
+def compact_month(storage, dataset, month, max_workers=8):
+    """Merge the daily files of ``month`` into its compacted file and drop them. Returns the files merged.
+
+    A day present both in the compacted file and as a daily file (a rerun of a compacted day) keeps the
+    daily rows.
+    """
+    files = read_index(storage, dataset)
+    daily = sorted(key for key, entry in files.items() if entry['kind'] == 'daily' and entry['month'] == month)
+    if not daily:
+        return []
+    target = compacted_key(dataset, month)
+    tables = run_concurrently(lambda key: _get_table(storage, key), daily, max_workers)
+    if target in files:
+        days = pa.array([date.fromisoformat(files[key]['min']['dt']) for key in daily], pa.date32())
+        previous = _get_table(storage, target)
+        tables.append(previous.filter(pc.invert(pc.is_in(previous['dt'], value_set=days))))
+    table = pa.concat_tables(tables, promote_options='permissive')
+    entry = _put_table(storage, target, table, dataset)
+
+    files[target] = dict(entry, kind='monthly', month=month)
+    for key in daily:
+        del files[key]
+    # The index stops pointing at the daily files before they are deleted, so readers never miss rows
+    write_index(storage, dataset, files)
+    storage.delete(daily)
+    logging.info("%s %s: compacted %d daily files into %s", dataset, month, len(daily), target)
+    return daily
+
+
+def closed_months(storage, dataset, dt):
+    """Months before ``dt``'s month that still have daily files."""
+    files = read_index(storage, dataset).values()
+    return sorted({entry['month'] for entry in files if entry['kind'] == 'daily' and entry['month'] < dt[:7]})
+
+
+def _overlaps(entry, column, low, high):
+    file_low, file_high = entry['min'].get(column), entry['max'].get(column)
+    if file_low is None or file_high is None:
+        return True
+    return (high is None or file_low <= high) and (low is None or file_high >= low)
+
+
+def select_files(files, dataset, start=None, end=None, keys=None):
+    """The index entries that may hold rows with ``start <= dt <= end`` and a key column value in ``keys``."""
+    key_column = KEY_COLUMNS[dataset]
+    selected = []
+    for name, entry in sorted(files.items()):
+        if not _overlaps(entry, 'dt', start, end):
+            continue
+        if keys and not any(_overlaps(entry, key_column, key, key) for key in keys):
+            continue
+        selected.append(name)
+    return selected
+
+
+def scan(storage, dataset, start=None, end=None, keys=None, columns=None, max_workers=8):
+    """Read the snapshots of ``dataset`` as one Arrow table.
+
+    ``start``/``end`` are inclusive ``YYYY-MM-DD`` dates and ``keys`` the coin or exchange ids to keep.
+    Files whose statistics rule them out are never fetched, and the same filters are pushed down to the
+    row groups of the files that are read.
+    """
+    key_column = KEY_COLUMNS[dataset]
+    filters = []
+    if start:
+        filters.append(('dt', '>=', date.fromisoformat(start)))
+    if end:
+        filters.append(('dt', '<=', date.fromisoformat(end)))
+    if keys:
+        filters.append((key_column, 'in', list(keys)))
+    selected = select_files(read_index(storage, dataset), dataset, start, end, keys)
+    if not selected:
+        return pa.table({})
+    tables = run_concurrently(lambda key: _get_table(storage, key, columns, filters or None),
+                              selected, max_workers)
+    return pa.concat_tables(tables, promote_options='permissive')
@@ -0,0 +1,216 @@
+"""Object storage used by the pipeline and the dashboards.
+
+Everything that reads or writes the bucket goes through a ``Storage``. It has two implementations:
+
+* ``S3Storage``: one bucket of S3 or MinIO, through boto3.
+* ``LocalStorage``: a directory with the same key layout, for offline runs and tests. It also serves
+  deployments where the dashboard runs next to the data. Its ``buffer`` memory-maps files, so reading
+  a clean Parquet file neither copies it nor goes over the network.
+
+``open_storage`` builds either one from a URL: ``s3://bucket1`` or ``file:///data/bucket1``.
+"""
+import mmap
+import os
+import tempfile
+from pathlib import Path
+from urllib.parse import urlparse
+
+
+class NotFound(KeyError):
+    """The key does not exist in the storage."""
+
+
+class Storage:
+    """Key/value access to one bucket. Keys are ``/``-separated paths such as ``clean/dt=.../x.parquet``."""
+
+    def get(self, key):
+        """Return the whole object as bytes. Raises NotFound."""
+        raise NotImplementedError
+
+    def stream(self, key):
+        """Return a readable binary file object over the object, for reading it incrementally."""
+        raise NotImplementedError
+
+    def buffer(self, key):
+        """Return the object as a bytes-like buffer. Local files are memory-mapped instead of read."""
+        return self.get(key)
+
+    def put(self, key, body, content_type=None, metadata=None):
+        """Write ``body`` (bytes or a binary file object) to ``key``, replacing it."""
+        raise NotImplementedError
+
+    def list(self, prefix):
+        """Yield the keys starting with ``prefix``, in lexical order."""
+        raise NotImplementedError
+
+    def head(self, key):
+        """Return ``{'etag': ..., 'size': ...}``; the etag changes whenever the object is rewritten."""
+        raise NotImplementedError
+
+    def delete(self, keys):
+        raise NotImplementedError
+
+    def exists(self, key):
+        try:
+            self.head(key)
+        except NotFound:
+            return False
+        return True
+
+
+class S3Storage(Storage):
+    def __init__(self, client, bucket):
+        self.client = client
+        self.bucket = bucket
+
+    def _call(self, method, key, **kwargs):
+        from botocore.exceptions import ClientError
+
+        try:
+            return getattr(self.client, method)(Bucket=self.bucket, Key=key, **kwargs)
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                raise NotFound(key) from e
+            raise
+
+    def get(self, key):
+        return self._call('get_object', key)['Body'].read()
+
+    def stream(self, key):
+        return self._call('get_object', key)['Body']
+
+    def put(self, key, body, content_type=None, metadata=None):
+        extra = {}
+        if content_type:
+            extra['ContentType'] = content_type
+        if metadata:
+            extra['Metadata'] = metadata
+        if isinstance(body, (bytes, bytearray, memoryview)):
+            self.client.put_object(Bucket=self.bucket, Key=key, Body=bytes(body), **extra)
+        else:
+            # Multipart for large file objects
+            self.client.upload_fileobj(body, self.bucket, key, ExtraArgs=extra)
+
+    def list(self, prefix):
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            for obj in page.get('Contents', []):
+                yield obj['Key']
+
+    def head(self, key):
+        response = self._call('head_object', key)
+        return {'etag': response['ETag'].strip('"'), 'size': response['ContentLength']}
+
+    def delete(self, keys):
+        keys = list(keys)
+        # DeleteObjects takes at most 1000 keys per call
+        for start in range(0, len(keys), 1000):
+            self.client.delete_objects(Bucket=self.bucket, Delete={
+                'Objects': [{'Key': key} for key in keys[start:start + 1000]]})
+
+
+class LocalStorage(Storage):
+    """A directory laid out like the bucket. Writes go to a temporary file first, then replace the target."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def _path(self, key):
+        return self.root / key
+
+    def _open(self, key):
+        try:
+            return open(self._path(key), 'rb')
+        except (FileNotFoundError, IsADirectoryError, NotADirectoryError) as e:
+            raise NotFound(key) from e
+
+    def get(self, key):
+        with self._open(key) as f:
+            return f.read()
+
+    def stream(self, key):
+        return self._open(key)
+
+    def buffer(self, key):
+        with self._open(key) as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return b''
+            # The mapping stays valid after the file is closed; replacing the file does not affect it
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def put(self, key, body, content_type=None, metadata=None):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                if isinstance(body, (bytes, bytearray, memoryview)):
+                    f.write(body)
+                else:
+                    while chunk := body.read(1024 * 1024):
+                        f.write(chunk)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def list(self, prefix):
+        # Only walk the deepest directory the prefix names, like an S3 prefix listing
+        base = self.root / prefix.rpartition('/')[0]
+        if not base.is_dir():
+            return
+        keys = []
+        for dirpath, _, filenames in os.walk(base):
+            for filename in filenames:
+                if filename.startswith('.tmp-'):
+                    continue
+                key = Path(dirpath, filename).relative_to(self.root).as_posix()
+                if key.startswith(prefix):
+                    keys.append(key)
+        yield from sorted(keys)
+
+    def head(self, key):
+        try:
+            stat = self._path(key).stat()
+        except (FileNotFoundError, NotADirectoryError) as e:
+            raise NotFound(key) from e
+        return {'etag': f'{stat.st_mtime_ns:x}-{stat.st_size:x}', 'size': stat.st_size}
+
+    def delete(self, keys):
+        for key in keys:
+            try:
+                self._path(key).unlink()
+            except FileNotFoundError:
+                pass
+
+
+def s3_storage(bucket, endpoint_url=None, access_key=None, secret_key=None):
+    import boto3
+
+    client = boto3.client('s3', endpoint_url=endpoint_url, aws_access_key_id=access_key,
+                          aws_secret_access_key=secret_key,
+                          config=boto3.session.Config(signature_version='v4'))
+    return S3Storage(client, bucket)
+
+
+def open_storage(url, endpoint_url=None, access_key=None, secret_key=None):
+    """Storage for ``s3://<bucket>`` (credentials as given) or ``file://<directory>``."""
+    parsed = urlparse(url)
+    if parsed.scheme == 's3':
+        return s3_storage(parsed.netloc, endpoint_url, access_key, secret_key)
+    if parsed.scheme == 'file':
+        return LocalStorage(parsed.netloc + parsed.path if parsed.netloc else parsed.path)
+    raise ValueError(f"Unsupported storage URL {url!r}, expected s3://<bucket> or file://<directory>")
+
+
+def read_arrow(storage, key, columns=None):
+    """Load a Parquet object into an Arrow table, straight from the (memory-mapped) buffer."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    return pq.read_table(pa.py_buffer(storage.buffer(key)), columns=columns)
+
+
+def read_parquet(storage, key, columns=None):
+    """Load a Parquet object into a DataFrame, straight from the (memory-mapped) buffer."""
+    return read_arrow(storage, key, columns).to_pandas()
@@ -0,0 +1,74 @@
+"""Incremental parsing of stored raw pages.
+
+A raw blob holds one API response per line. Instead of loading whole responses and normalizing them
+in one go, the records of each page's ``data`` array are decoded one at a time and collected into
+column lists. A DataFrame is handed out every ``batch_size`` records, so the parsed form of a payload
+never exists in memory all at once.
+"""
+import gzip
+import io
+import json
+import re
+
+import pandas as pd
+
+BATCH_SIZE = 10_000
+
+_decoder = json.JSONDecoder()
+_DATA_ARRAY = re.compile(r'"data"\s*:\s*\[')
+_SEPARATORS = re.compile(r'[\s,]*')
+_PAGE_TIMESTAMP = re.compile(r'"timestamp"\s*:\s*(\d+)\s*}\s*$')
+
+
+def iter_blob_lines(blob):
+    """Yield the page lines of a gzip raw blob without decompressing it all at once."""
+    with gzip.GzipFile(fileobj=io.BytesIO(blob), mode='rb') as gz:
+        for line in gz:
+            if line.strip():
+                yield line
+
+
+def iter_records(lines):
+    """Yield ``(page_timestamp, record)`` for every record of every page, decoding one record at a time."""
+    for line in lines:
+        text = line.decode('utf-8')
+        match = _DATA_ARRAY.search(text)
+        if match is None:
+            continue
+        timestamp = _PAGE_TIMESTAMP.search(text)
+        timestamp = int(timestamp.group(1)) if timestamp else None
+        pos = match.end()
+        while True:
+            pos = _SEPARATORS.match(text, pos).end()
+            if pos >= len(text) or text[pos] == ']':
+                break
+            record, pos = _decoder.raw_decode(text, pos)
+            yield timestamp, record
+
+
+def iter_batches(lines, batch_size=BATCH_SIZE):
+    """Yield DataFrames of at most ``batch_size`` records, with the page timestamp as first column.
+
+    Columns keep the order in which keys are first seen. A key missing from a record is null in that
+    row. At least one (possibly empty) frame is always produced.
+    """
+    timestamps, columns, size, produced = [], {}, 0, False
+    for timestamp, record in iter_records(lines):
+        for key in record:
+            if key not in columns:
+                columns[key] = [None] * size
+        for key, values in columns.items():
+            values.append(record.get(key))
+        timestamps.append(timestamp)
+        size += 1
+        if size == batch_size:
+            yield _frame(timestamps, columns)
+            timestamps, columns, size, produced = [], {key: [] for key in columns}, 0, True
+    if size or not produced:
+        yield _frame(timestamps, columns)
+
+
+def _frame(timestamps, columns):
+    df = pd.DataFrame(columns)
+    df.insert(0, 'timestamp', pd.to_datetime(pd.Series(timestamps, dtype='float64'), unit='ms'))
+    return df
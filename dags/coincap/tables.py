@@ -0,0 +1,200 @@
+"""Server-side paging, sorting and filtering for the dashboards' DataTables.
+
+The tables run with ``page_action``, ``sort_action`` and ``filter_action`` set to ``'custom'``: the
+browser sends its page, ``sort_by`` and ``filter_query`` and the callback answers with the rows of
+that one page. A ``TableSource`` wraps a frame already in memory and an ``ArrowTableSource`` an Arrow
+table, for instance one memory-mapped from disk (see coincap.shared), without converting it to pandas.
+Both keep the last few filtered and sorted views, so turning pages only slices, and the payload is one
+page however large the table is.
+
+``filter_query`` uses the DataTable syntax: ``{column} op value`` parts joined by ``&&``, with the
+operators ``=``/``eq``, ``!=``/``ne``, ``<``/``lt``, ``<=``/``le``, ``>``/``gt``, ``>=``/``ge``,
+``contains`` and ``datestartswith``. The table prefixes them with ``s`` (case-sensitive, its default,
+so typing ``> 100`` sends ``{column} s> 100``) or ``i`` (case-insensitive).
+"""
+import logging
+import math
+import re
+from functools import lru_cache
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+PAGE_SIZE = 10
+# Shown in place of missing and empty values
+PLACEHOLDER = 'N/A'
+# Filtered and sorted views each source keeps, so paging through one view does not redo the work
+VIEW_CACHE_SIZE = 8
+
+_COMPARISONS = {'=': 'eq', '!=': 'ne', '<': 'lt', '<=': 'le', '>': 'gt', '>=': 'ge'}
+_CASED = {'eq', 'ne', 'lt', 'le', 'gt', 'ge', 'contains'}
+_FILTER_PART = re.compile(
+    r'^\s*\{(?P<column>[^}]+)\}\s*'
+    r'(?P<op>(?P<case>[si])?(?P<name>[<>]=?|!=|=|eq|ne|lt|le|gt|ge|contains)|datestartswith)\s*'
+    r'(?P<value>.*?)\s*$')
+
+
+def table_columns(names):
+    return [{'id': c, 'name': c} for c in names]
+
+
+def _missing(value):
+    return value is None or value == '' or (isinstance(value, float) and math.isnan(value))
+
+
+def fill_missing(records, placeholder=PLACEHOLDER):
+    """``records`` with missing and empty values replaced by ``placeholder``, in place."""
+    for record in records:
+        for column, value in record.items():
+            if _missing(value):
+                record[column] = placeholder
+    return records
+
+
+def parse_filter(filter_query):
+    """``[(column, operator, value), ...]`` of a DataTable ``filter_query``. Parts it cannot read are skipped.
+
+    Operators come back as names with their case prefix, if any: ``s> 100`` is ``('sgt', '100')``.
+    """
+    parts = []
+    for part in (filter_query or '').split('&&'):
+        if not part.strip():
+            continue
+        match = _FILTER_PART.match(part)
+        if not match:
+            logging.warning("Ignoring filter %r", part)
+            continue
+        op = match['op'] if match['op'] == 'datestartswith' else (
+            (match['case'] or '') + _COMPARISONS.get(match['name'], match['name']))
+        value = match['value']
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in '"\'`':
+            value = value[1:-1]
+        parts.append((match['column'], op, value))
+    return parts
+
+
+def _number(value):
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _split_case(op):
+    # ('i' prefix, operator): 'icontains' and 'i=' ignore case, 's' and no prefix do not
+    if op[:1] in ('s', 'i') and op[1:] in _CASED:
+        return op[0] == 'i', op[1:]
+    return False, op
+
+
+def _mask(series, op, value):
+    insensitive, op = _split_case(op)
+    if op == 'contains':
+        return series.astype(str).str.contains(value, case=not insensitive, regex=False)
+    if op == 'datestartswith':
+        return series.astype(str).str.startswith(value)
+    number = _number(value)
+    if number is not None:
+        # Numbers compare as numbers, also in columns that hold placeholders next to them
+        series, value = pd.to_numeric(series, errors='coerce'), number
+    else:
+        series = series.astype(str)
+        if insensitive:
+            series, value = series.str.lower(), value.lower()
+    return getattr(series, op)(value).fillna(False).astype(bool)
+
+
+def _sort_key(series):
+    numbers = pd.to_numeric(series, errors='coerce')
+    # Numeric columns sort as numbers with missing values last, anything else as text
+    return numbers if numbers.notna().any() else series.astype(str)
+
+
+class TableSource:
+    """One frame served page by page to a DataTable with custom paging, sorting and filtering."""
+
+    def __init__(self, df):
+        self.df = df
+        self.columns = table_columns(df.columns)
+        self._view = lru_cache(maxsize=VIEW_CACHE_SIZE)(self._select)
+
+    def _select(self, sort, filter_query):
+        df = self.df
+        for column, op, value in parse_filter(filter_query):
+            if column in df.columns:
+                df = df[_mask(df[column], op, value)]
+        sort = [(column, direction) for column, direction in sort if column in df.columns]
+        if sort:
+            df = df.sort_values([column for column, _ in sort], ascending=[d == 'asc' for _, d in sort],
+                                key=_sort_key, na_position='last', kind='stable')
+        return df
+
+    def _records(self, view, start, size):
+        return view.iloc[start:start + size].to_dict('records')
+
+    def page(self, page_current=0, page_size=PAGE_SIZE, sort_by=None, filter_query=''):
+        """``(records, page_count)`` of one page of the filtered and sorted frame."""
+        sort = tuple((item['column_id'], item['direction']) for item in sort_by or [])
+        view = self._view(sort, filter_query or '')
+        page_size = page_size or PAGE_SIZE
+        page_count = max(1, math.ceil(len(view) / page_size))
+        start = min(page_current or 0, page_count - 1) * page_size
+        return self._records(view, start, page_size), page_count
+
+
+def _arrow_mask(column, op, value):
+    if pa.types.is_dictionary(column.type):
+        column = column.cast(column.type.value_type)
+    insensitive, op = _split_case(op)
+    if op == 'contains':
+        return pc.match_substring(pc.cast(column, pa.string()), value, ignore_case=insensitive)
+    if op == 'datestartswith':
+        return pc.starts_with(pc.cast(column, pa.string()), value)
+    op = {'eq': 'equal', 'ne': 'not_equal', 'lt': 'less', 'le': 'less_equal', 'gt': 'greater',
+          'ge': 'greater_equal'}[op]
+    number = _number(value)
+    if number is not None and (pa.types.is_integer(column.type) or pa.types.is_floating(column.type)):
+        return getattr(pc, op)(column, number)
+    text = pc.cast(column, pa.string())
+    if insensitive:
+        text, value = pc.utf8_lower(text), value.lower()
+    return getattr(pc, op)(text, value)
+
+
+class ArrowTableSource(TableSource):
+    """A ``TableSource`` over an Arrow table. Only the rows of the page are turned into Python objects.
+
+    With a ``placeholder``, missing and empty values of those rows are sent as it.
+    """
+
+    def __init__(self, table, placeholder=None):
+        self.table = table
+        self.placeholder = placeholder
+        self.columns = table_columns(table.column_names)
+        self._view = lru_cache(maxsize=VIEW_CACHE_SIZE)(self._select)
+
+    def _select(self, sort, filter_query):
+        table = self.table
+        for column, op, value in parse_filter(filter_query):
+            if column in table.column_names:
+                table = table.filter(pc.fill_null(_arrow_mask(table[column], op, value), False))
+        sort = [(column, direction) for column, direction in sort if column in table.column_names]
+        if sort:
+            # Dictionary columns cannot be sorted directly; their values can
+            keys = pa.table({f'_{i}': (table[column].cast(table[column].type.value_type)
+                                       if pa.types.is_dictionary(table[column].type) else table[column])
+                             for i, (column, _) in enumerate(sort)})
+            indices = pc.sort_indices(keys, sort_keys=[(f'_{i}', 'ascending' if direction == 'asc' else 'descending')
+                                                       for i, (_, direction) in enumerate(sort)],
+                                      null_placement='at_end')
+            table = table.take(indices)
+        return table
+
+    def _records(self, view, start, size):
+        records = view.slice(start, size).to_pylist()
+        return records if self.placeholder is None else fill_missing(records, self.placeholder)
+
+
+def empty_source(columns=()):
+    return TableSource(pd.DataFrame(columns=list(columns)))
@@ -0,0 +1,143 @@
+"""Parallel transform of raw blobs into the clean layer.
+
+Every object goes through three stages: download (thread), parse/normalize/serialize (process) and
+upload (thread). The stages are chained per object, so objects download and upload while others are
+being normalized, and normalization runs on every core instead of one Python loop.
+"""
+import logging
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+from coincap.quality import id_columns_for, id_hashes
+from coincap.schema import apply_schema, arrow_schema, conform
+from coincap.stream import BATCH_SIZE, iter_batches, iter_blob_lines
+
+DEFAULT_IO_THREADS = 8
+# Starting a worker process (and importing pandas in it) takes about a second; runs with less raw data
+# than this are faster in-process.
+PARALLEL_MIN_BYTES = 64 * 1024 * 1024
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def transform_blob(blob, batch_size=BATCH_SIZE, id_columns=()):
+    """CPU stage: a gzip raw blob in, the typed Parquet file out. Runs in a worker process.
+
+    Records are parsed and typed ``batch_size`` at a time and each batch is written as its own row
+    group, so peak memory follows the batch size rather than the size of the payload. A row whose
+    ``id_columns`` repeat an earlier row's is dropped (see coincap.quality.MAX_DUPLICATE_RATIO).
+    """
+    body, late = _write_parquet(blob, batch_size, id_columns)
+    if late:
+        # A file's columns are fixed by its first row group. Columns first seen in a later batch are declared
+        # up front in a second pass (null in the rows before), which only payloads like this one pay for.
+        logging.warning("Columns first seen after the first batch, parsing again: %s", late)
+        body, _ = _write_parquet(blob, batch_size, id_columns, late)
+    return body
+
+
+def _write_parquet(blob, batch_size, id_columns=(), extra_columns=()):
+    """``(parquet bytes, columns seen only after the first batch)``; those columns are left out of the file."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = pa.BufferOutputStream()
+    writer, late = None, []
+    seen, duplicates = np.empty(0, 'uint64'), 0
+    try:
+        for batch in iter_batches(iter_blob_lines(blob), batch_size):
+            if id_columns and set(id_columns) <= set(batch.columns):
+                hashes = id_hashes(batch, list(id_columns))
+                keep = ~(pd.Series(hashes).duplicated().to_numpy() | np.isin(hashes, seen))
+                seen = np.concatenate([seen, hashes[keep]])
+                if not keep.all():
+                    duplicates += int((~keep).sum())
+                    batch = batch[keep].reset_index(drop=True)
+            if writer is None:
+                for column in extra_columns:
+                    if column not in batch.columns:
+                        batch[column] = pd.Series([None] * len(batch), index=batch.index, dtype=object)
+            batch = apply_schema(batch)
+            if writer is None:
+                schema = arrow_schema(batch)
+                writer = pq.ParquetWriter(sink, schema, compression='zstd')
+            # Later batches may lack a column (filled with nulls) or bring one the first batch did not have
+            late.extend(column for column in batch.columns if column not in schema.names and column not in late)
+            batch = batch.reindex(columns=schema.names)
+            writer.write_table(conform(batch, schema))
+    finally:
+        if writer is not None:
+            writer.close()
+    if duplicates:
+        logging.warning("Dropped %d rows repeating an earlier row's %s", duplicates, list(id_columns))
+    return sink.getvalue().to_pybytes(), late
+
+
+def _cpu_pool(workers):
+    if workers <= 1:
+        return ThreadPoolExecutor(max_workers=1)
+    # spawn rather than fork: the task process already runs threads (S3 transfers, logging)
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+
+def transform_objects(storage, jobs, workers=None, io_threads=DEFAULT_IO_THREADS, on_written=None):
+    """Transform ``(source_key, dest_key)`` jobs, keeping every stage busy. Returns the keys written.
+
+    At most two objects per worker are in flight at a time, which bounds memory however many objects
+    a run has. A payload that fails to parse is logged and skipped, as before. Any other failure is
+    raised once the remaining objects are done. ``on_written(source, dest)`` is called after each
+    upload, so callers can record progress even when the run fails later.
+    """
+    jobs = iter(jobs)
+    workers = workers or default_workers()
+    # Downloaded blobs wait in memory for a CPU worker, so the bound follows the workers, not the IO threads
+    max_in_flight = 2 * workers
+    written, failures = [], []
+
+    def download(source):
+        return storage.get(source)
+
+    def upload(dest, body):
+        storage.put(dest, body, content_type='application/vnd.apache.parquet')
+
+    with _cpu_pool(workers) as cpu, ThreadPoolExecutor(max_workers=io_threads) as io:
+        pending = {}
+
+        def top_up():
+            while len(pending) < max_in_flight:
+                job = next(jobs, None)
+                if job is None:
+                    return
+                pending[io.submit(download, job[0])] = ('download',) + tuple(job)
+
+        top_up()
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage, source, dest = pending.pop(future)
+                error = future.exception()
+                if error is not None:
+                    logging.error("%s of %s failed: %s", stage, source, error)
+                    if not isinstance(error, ValueError):
+                        failures.append(source)
+                elif stage == 'download':
+                    pending[cpu.submit(transform_blob, future.result(), BATCH_SIZE, id_columns_for(dest))] = (
+                        'transform', source, dest)
+                elif stage == 'transform':
+                    pending[io.submit(upload, dest, future.result())] = ('upload', source, dest)
+                else:
+                    written.append(dest)
+                    print(f"File uploaded to {dest}")
+                    if on_written is not None:
+                        on_written(source, dest)
+            top_up()
+
+    if failures:
+        raise RuntimeError(f"{len(failures)} objects failed to transform: {failures}")
+    return written
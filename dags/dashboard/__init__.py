@@ -0,0 +1,7 @@
+"""The coincap dashboard: one Dash app with a page per dataset, served by dags/app.py and dash_app/app.py.
+
+The two entry points differ only in how they reach the bucket: dags/app.py through the pipeline's
+Airflow Variables, dash_app/app.py through environment variables of the same names (coincap.config).
+Pages live in ``dashboard/pages`` and are registered when the app is created; their data is loaded
+later, see dashboard.data.
+"""
@@ -0,0 +1,105 @@
+import os
+
+import dash
+import dash_bootstrap_components as dbc
+from dash import Input, Output, dcc, html
+
+from coincap.config import dashboard_storage
+from dashboard import data
+
+PAGES_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pages")
+
+# the style arguments for the sidebar. We use position:fixed and a fixed width
+SIDEBAR_STYLE = {
+    "position": "fixed",
+    "top": 0,
+    "left": 0,
+    "bottom": 0,
+    "width": "16rem",
+    "padding": "2rem 1rem",
+    "background-color": "#f8f9fa",
+}
+
+# the styles for the main content position it to the right of the sidebar and
+# add some padding.
+CONTENT_STYLE = {
+    "margin-left": "15rem",
+    "margin-right": "5rem",
+    "padding": "2rem 1rem",
+}
+
+
+def not_found(pathname):
+    return html.Div(
+        [
+            html.H1("404: Not found", className="text-danger"),
+            html.Hr(),
+            html.P(f"The pathname {pathname} was not recognised..."),
+        ],
+        className="p-3 bg-light rounded-3",
+    )
+
+
+def create_app(storage=dashboard_storage):
+    """The dashboard app, reaching the bucket through ``storage()``. Returns before any data is read."""
+    data.use_storage(storage)
+    # Named after the package, so the pages are imported as dashboard.pages.<name>; registering a page reads no data
+    app = dash.Dash("dashboard", external_stylesheets=[dbc.themes.BOOTSTRAP], use_pages=True,
+                    pages_folder=PAGES_FOLDER, suppress_callback_exceptions=True)
+
+    sidebar = html.Div(
+        [
+            html.H2("Sidebar", className="display-4"),
+            html.Hr(),
+            html.P(
+                "A simple sidebar layout with navigation links", className="lead"
+            ),
+            dbc.Nav(
+                [
+                    dbc.NavLink(
+                        [
+                            html.Div(page["name"], className="ms-2"),
+                        ],
+                        href=page["path"],
+                        active="exact",
+                    )
+                    for page in dash.page_registry.values()
+                ],
+                vertical=True,
+                pills=True,
+            ),
+        ],
+        style=SIDEBAR_STYLE,
+    )
+
+    content = html.Div([
+        dbc.Row(
+            [
+                dbc.Col(
+                    [
+                        sidebar
+                    ], xs=4, sm=4, md=2, lg=2, xl=2, xxl=2),
+
+                dbc.Col(
+                    [
+                        dash.page_container
+                    ], xs=8, sm=8, md=10, lg=10, xl=10, xxl=10)
+            ]
+        )
+    ], id="page-content", style=CONTENT_STYLE)
+
+    app.layout = html.Div([dcc.Location(id="url"), sidebar, content])
+    layouts = {page["path"]: page["layout"] for page in dash.page_registry.values()}
+
+    @app.callback(Output("page-content", "children"), [Input("url", "pathname")])
+    def render_page_content(pathname):
+        if pathname == "/":
+            return html.P("This is the content of the home page!")
+        elif pathname in layouts:
+            return layouts[pathname]()
+        # If the user tries to reach a different page, return a 404 message
+        return not_found(pathname)
+
+    # The data loads while the server is already answering; a page asked for first loads its own
+    data.warm_in_background()
+    return app
@@ -0,0 +1,80 @@
+"""The pages' data, declared when a page is imported and loaded only once something needs it.
+
+Importing a page does no I/O: ``partition()`` only records which clean file the page shows. The storage
+is opened and the file read the first time a layout or callback asks for it, or before that by
+``warm()``, which ``create_app`` runs in a background thread. The server therefore starts in the time it
+takes to import the code, however many pages and datasets there are, and the data follows.
+"""
+import logging
+import threading
+import time
+
+from coincap.config import dashboard_setting, dashboard_storage
+from coincap.provider import LatestPartition
+
+# How the pages reach the bucket; dags/app.py switches it to the pipeline's Airflow Variables
+_source = {'storage': dashboard_storage}
+_partitions = []
+
+
+def use_storage(factory):
+    """Open the dashboard's storage with ``factory()`` instead of coincap.config.dashboard_storage."""
+    _source['storage'] = factory
+
+
+def storage():
+    return _source['storage']()
+
+
+def cache_dir():
+    # Clean files are shared with the other worker processes as memory-mapped Arrow files (coincap.shared)
+    return dashboard_setting('COINCAP_CACHE_DIR')
+
+
+class LazyPartition:
+    """A coincap.provider.LatestPartition created and loaded on the first ``current()``."""
+
+    def __init__(self, dataset, filename, build, columns):
+        self.dataset = dataset
+        self._args = (dataset, filename, build, columns)
+        self._partition = None
+        self._lock = threading.Lock()
+
+    def partition(self):
+        partition = self._partition
+        if partition is None:
+            with self._lock:
+                # Requests arriving during the first load wait for it instead of each reading the file
+                if self._partition is None:
+                    self._partition = LatestPartition(
+                        storage(), *self._args, interval=int(dashboard_setting('COINCAP_REFRESH_SECONDS')),
+                        cache_dir=cache_dir()).start()
+                partition = self._partition
+        return partition
+
+    def current(self):
+        """The latest complete snapshot, see LatestPartition.current."""
+        return self.partition().current()
+
+
+def partition(dataset, filename, build, columns):
+    """Declare the newest clean ``<dataset>/<filename>.parquet`` for a page; nothing is read yet."""
+    lazy = LazyPartition(dataset, filename, build, columns)
+    _partitions.append(lazy)
+    return lazy
+
+
+def warm():
+    """Load every declared dataset now. A failure is logged; the pages try again when they need the data."""
+    for lazy in _partitions:
+        start = time.perf_counter()
+        try:
+            lazy.partition()
+        except Exception as e:
+            logging.error("Could not load %s: %s", lazy.dataset, e)
+            continue
+        logging.info("%s ready in %.2fs", lazy.dataset, time.perf_counter() - start)
+
+
+def warm_in_background():
+    threading.Thread(target=warm, name='warm-datasets', daemon=True).start()
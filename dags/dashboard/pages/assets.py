@@ -0,0 +1,223 @@
+import dash
+import dash_bootstrap_components as dbc
+from dash import dcc, html, callback, clientside_callback, dash_table
+from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
+
+from coincap.lookup import RowIndex, asset_loader, markets_loader
+from coincap.quality import REQUIRED_COLUMNS
+from coincap.tables import PAGE_SIZE, empty_source, table_columns
+from dashboard.data import cache_dir, partition, storage
+
+
+def build(table, dt):
+    # Per-coin row numbers and volume totals, so the callback does not filter the table; the rows themselves stay
+    # in the shared memory map until a coin is selected. A coin's markets are read from the same day's
+    # coin_markets partition the first time it is selected.
+    by_name = RowIndex(table['name'])
+    return {
+        'load_asset': asset_loader(table, by_name),
+        'load_markets': markets_loader(storage(), dt, cache_dir=cache_dir()) if dt else lambda coin: empty_source(),
+        'names': by_name.values,
+        'columns': table_columns(table.column_names),
+    }
+
+
+# The newest clean assets file, loaded after startup and reloaded in the background when a newer one is written
+data = partition('assets', 'coincap_assets', build, REQUIRED_COLUMNS['assets'])
+
+dash.register_page(__name__)  # '/' is home page
+
+
+def coin_card(names):
+    return dbc.Card(
+        [
+            dbc.CardBody(
+                [
+                    html.H4("Crypto Coins", className='card-title'),
+                    html.P("Select Coins: ", className="card-text"
+                           ),
+                    dcc.Dropdown(
+                        id='select_coin',
+                        options=[{'label': i, 'value': i} for i in names],
+                        value='Bitcoin', className="mb-4", style={'color': 'green'}
+                    ),
+
+                ]
+            )
+        ], color="info", inverse=True,
+    )
+
+card_tot_vol = dbc.Card(
+    [
+
+        dbc.CardBody(
+            [
+                html.H4("Total Volume in USD", className="card-title", style={'color': 'blue'}),
+
+                html.H3("$", className='card-text', id='total_volume')
+
+            ]
+        ),
+        dbc.CardFooter("Total volume in last 24 hour", style={'color': 'white'}),
+    ],
+    style={"width": "20rem"}, color="dark", inverse=True
+)
+
+card_market = dbc.Card(
+    [
+
+        dbc.CardBody(
+            [
+                html.H4("Market Cap", className="card-title", style={'color': 'blue'}),
+
+                html.H3('$', className='card-text', id='market_cap')
+
+            ]
+        ),
+        dbc.CardFooter("", style={'color': 'white'}, id='percent_change_footer'),
+    ],
+    style={"width": "20rem"}, color="dark", inverse=True
+)
+
+# A function, so every page load lists the coins of the data in memory at that moment
+def layout():
+    return html.Div(
+
+        [
+            html.Div(coin_card(data.current()['names']), id='page-content-assets'),
+            html.Br(),
+            dbc.Row(
+                [
+                    dbc.Col(card_market),
+                    dbc.Col(card_tot_vol)
+                ],
+                className="mb-4",
+            ),
+            html.Div(dbc.Table(id='table2')),
+            html.Div([dbc.Table(id='market_tbl'),
+
+                      ]),
+            # The selected coin's raw card values; the browser formats them
+            dcc.Store(id='asset-values'),
+        ]
+    )
+
+
+@callback([Output("table2", "children"),
+           Output("market_tbl", "children"),
+           Output("asset-values", "data")],
+          [Input("select_coin", "value")])
+def render_page_content(value):
+    # A dict lookup and the coin's own rows: the row numbers were found when the data was loaded.
+    # The snapshot is read once, so a refresh in between cannot mix two days' data.
+    snapshot = data.current()
+    asset = snapshot['load_asset'](value)
+    if asset is None:
+        raise PreventUpdate
+    table = dash_table.DataTable(
+        data=asset['records'],
+        columns=snapshot['columns'],
+        fixed_columns={'headers': True, 'data': 1},
+        style_table={'minWidth': '100%'},
+        style_header={
+            'backgroundColor': 'rgb(150, 75, 100)',
+            'color': 'white'
+        },
+        style_data={
+            'backgroundColor': 'rgb(50, 40, 120)',
+            'color': 'white'
+        },
+        style_data_conditional=[
+            {
+                'if': {
+                    'filter_query': '{changePercent24Hr}  < 0',
+                    'column_id': 'changePercent24Hr'
+                },
+                'color': 'red',
+                'fontWeight': 'bold',
+                'backgroundColor': 'white'
+            },
+
+            {
+                'if': {
+                    'filter_query': '{changePercent24Hr}  > 0',
+                    'column_id': 'changePercent24Hr'
+                },
+                'color': 'green',
+                'fontWeight': 'bold',
+                'backgroundColor': 'white'
+
+            }, ]
+    )
+    # Only the first page is sent; markets_page answers for the others and for sorting and filtering
+    markets = snapshot['load_markets'](asset['id'])
+    market_records, page_count = markets.page(0, PAGE_SIZE)
+    market_tbl = dash_table.DataTable(id='market-table',
+                                      data=market_records,
+                                      columns=markets.columns,
+                                      fixed_columns={'headers': True, 'data': 1},
+                                      style_table={'minWidth': '100%'},
+                                      style_header={
+                                          'backgroundColor': 'rgb(40, 75, 100)',
+                                          'color': 'white'
+                                      },
+                                      style_data={
+                                          'backgroundColor': 'rgb(100, 40, 120)',
+                                          'color': 'white'
+                                      },
+                                      page_action="custom",
+                                      page_current=0,
+                                      page_size=PAGE_SIZE,
+                                      page_count=page_count,
+                                      sort_action="custom",
+                                      sort_mode="multi",
+                                      sort_by=[],
+                                      filter_action="custom",
+                                      filter_query='',
+
+                                      )
+    values = {column: asset[column] for column in ('marketCapUsd', 'changePercent24Hr', 'volumeUsd24Hr')}
+    return table, market_tbl, values
+
+
+# Formatting and colouring the card values needs nothing from the server, so it runs in the browser
+clientside_callback(
+    """
+    function(values) {
+        if (!values) {
+            return window.dash_clientside.no_update;
+        }
+        const number = v => (v === null || v === '' || isNaN(Number(v))) ? null : Number(v);
+        const usd = new Intl.NumberFormat('en-US', {style: 'currency', currency: 'USD', notation: 'compact',
+                                                    minimumFractionDigits: 0, maximumFractionDigits: 2});
+        const money = v => number(v) === null ? 'N/A' : usd.format(number(v));
+        const change = number(values.changePercent24Hr);
+        const text = change === null ? 'N/A' : (change > 0 ? '+' : '') + change.toFixed(2) + '% in 24h';
+        const color = change === null ? 'white' : (change < 0 ? 'red' : 'lime');
+        return [money(values.marketCapUsd), text, {'color': color}, money(values.volumeUsd24Hr)];
+    }
+    """,
+    [Output('market_cap', 'children'),
+     Output('percent_change_footer', 'children'),
+     Output('percent_change_footer', 'style'),
+     Output('total_volume', 'children')],
+    Input('asset-values', 'data'),
+)
+
+
+@callback([Output("market-table", "data"),
+           Output("market-table", "page_count")],
+          [Input("market-table", "page_current"),
+           Input("market-table", "page_size"),
+           Input("market-table", "sort_by"),
+           Input("market-table", "filter_query")],
+          State("select_coin", "value"),
+          prevent_initial_call=True)
+def markets_page(page_current, page_size, sort_by, filter_query, value):
+    # The coin's markets frame is already in memory; only the requested page goes back to the browser
+    snapshot = data.current()
+    asset = snapshot['load_asset'](value)
+    if asset is None:
+        raise PreventUpdate
+    return snapshot['load_markets'](asset['id']).page(page_current, page_size, sort_by, filter_query)
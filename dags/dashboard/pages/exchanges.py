@@ -0,0 +1,165 @@
+import dash
+import dash_bootstrap_components as dbc
+from dash import dcc, html, callback, clientside_callback, dash_table
+from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
+
+from coincap.lookup import RowIndex, rows_loader
+from coincap.quality import REQUIRED_COLUMNS
+from coincap.tables import PAGE_SIZE, empty_source
+from dashboard.data import partition
+
+
+def volume_figures(table):
+    # Both charts as plain figure dicts, sent with the page so the browser can switch between them. Plotly
+    # Express takes most of a second to import, so it is imported here, in the refresh thread, not at startup.
+    import plotly.express as px
+
+    df = table.select(['name', 'volumeUsd', 'percentTotalVolume']).to_pandas()
+    df['volumeUsd'] = '$' + (df['volumeUsd'].astype(float) / 1000000000).round(2).astype('str') + 'B'
+    fig_pie = px.pie(df, values='percentTotalVolume', names='name', hover_data='volumeUsd')
+    fig_pie.update_traces(textposition='inside', textinfo='percent+label')
+    fig_bar = px.bar(df, y='percentTotalVolume', x='name', hover_data='volumeUsd', color='name',
+                     labels={'percentTotalVolume': 'Volume in %', 'name': 'Exchange Name'}, text_auto=True)
+    return {'pie': fig_pie.to_plotly_json(), 'bar': fig_bar.to_plotly_json()}
+
+
+def build(table, dt):
+    # The table pages through each exchange's rows with placeholders filled, taken from the shared memory map when
+    # the exchange is selected. The figures are built here, in the refresh thread, once per data version; a new
+    # version brings its own.
+    by_name = RowIndex(table['name'])
+    return {'load_rows': rows_loader(table, by_name), 'columns': table.column_names,
+            'figures': volume_figures(table), 'names': by_name.values}
+
+
+# The newest clean exchanges file, loaded after startup and reloaded in the background when a newer one is written
+data = partition('exchanges', 'coincap_exchanges', build, REQUIRED_COLUMNS['exchanges'])
+
+dash.register_page(__name__)  # '/' is home page
+
+
+def exchange_card(names):
+    return dbc.Card(
+        [
+            dbc.CardBody(
+                [
+                    html.H4("Exchanges by Volume", className='card-title'),
+
+                    html.P("Select Exchanges: ", className="card-text"
+                           ),
+                    dcc.Dropdown(
+                        id='select_exchange',
+                        options=[{'label': i, 'value': i} for i in names],
+                        value='Binance', className="mb-4", style={'color': 'green'}
+                    ),
+
+                ]
+            )
+        ], color="info", inverse=True,
+    )
+
+# df['volumeUsd'] = '$' + (df['volumeUsd'].astype(float) / 1000000000).round(2).astype(str) + 'B'
+# fig = px.pie(df, values='percentTotalVolume', names='name', hover_data='volumeUsd')
+#
+# fig.update_traces(textposition='inside', textinfo='percent+label')
+
+# A function, so every page load lists the exchanges of the data in memory at that moment
+def layout():
+    snapshot = data.current()
+    return html.Div(
+
+        [
+            html.Div(exchange_card(snapshot['names']), id='page-content'),
+            html.Div(dbc.Table(id='table')),
+            dbc.Card(dbc.CardBody([html.H4("Exchanges", className="card-title"),
+                                   html.Div([
+                                       dbc.Button("PIE", id="pie-chart", n_clicks=0, className='me-1', color='success'),
+                                       dbc.Button("BAR", id="bar-graph", n_clicks=0, className='me-1', color='success'),
+                                   ]
+                                   ),
+                                   dcc.Graph(id='exchange-volume'),
+                                   ]), className="mb-3", ),
+            # The figures of the data version in memory when the page was loaded
+            dcc.Store(id='volume-figures', data={'version': snapshot['etag'], 'figures': snapshot['figures']}),
+        ]
+    )
+
+
+@callback(Output("table", "children"),
+
+          [Input("select_exchange", "value")])
+def render_page_content(value):
+    # Only the first page is sent; exchange_page answers for the others and for sorting and filtering
+    snapshot = data.current()
+    rows = snapshot['load_rows'](value) or empty_source(snapshot['columns'])
+    records, page_count = rows.page(0, PAGE_SIZE)
+    table = dash_table.DataTable(
+        records, rows.columns, id='exchange-table',
+        page_action='custom', page_current=0, page_size=PAGE_SIZE, page_count=page_count,
+        sort_action='custom', sort_mode='multi', sort_by=[], filter_action='custom', filter_query='',
+        fixed_columns={'headers': True, 'data': 1},
+        style_table={'minWidth': '100%'},
+        style_as_list_view=True,
+        style_cell={'padding': '5px'},
+        style_header={
+
+            'fontWeight': 'bold',
+            'border': '1px solid pink',
+            'backgroundColor': 'rgb(30, 30, 30)',
+            'color': 'white'
+        },
+        style_data_conditional=[
+            {
+                'if': {
+                    'filter_query': '{{{col}}} = "N/A"'.format(col=col),
+                    'column_id': col
+                },
+                'backgroundColor': 'tomato',
+                'color': 'white'
+            } for col in snapshot['columns']
+        ],
+        style_data={
+            'backgroundColor': 'rgb(80, 50, 80)',
+            'color': 'white',
+            'border': '1px solid pink',
+        },
+    )
+
+    return table
+
+
+@callback([Output("exchange-table", "data"),
+           Output("exchange-table", "page_count")],
+          [Input("exchange-table", "page_current"),
+           Input("exchange-table", "page_size"),
+           Input("exchange-table", "sort_by"),
+           Input("exchange-table", "filter_query")],
+          State("select_exchange", "value"),
+          prevent_initial_call=True)
+def exchange_page(page_current, page_size, sort_by, filter_query, value):
+    rows = data.current()['load_rows'](value)
+    if rows is None:
+        raise PreventUpdate
+    return rows.page(page_current, page_size, sort_by, filter_query)
+
+
+# Switching between the two prepared figures needs nothing from the server, so it runs in the browser
+clientside_callback(
+    """
+    function(pie, bar, store) {
+        const triggered = window.dash_clientside.callback_context.triggered;
+        const charts = {'pie-chart': 'pie', 'bar-graph': 'bar'};
+        // The button that was clicked picks the chart, not which one has been clicked before
+        const chart = triggered.length ? charts[triggered[0].prop_id.split('.')[0]] : undefined;
+        if ((!pie && !bar) || !chart || !store) {
+            return window.dash_clientside.no_update;
+        }
+        return store.figures[chart];
+    }
+    """,
+    Output("exchange-volume", 'figure'),
+    [Input("pie-chart", "n_clicks"),
+     Input("bar-graph", "n_clicks")],
+    State("volume-figures", "data"),
+)
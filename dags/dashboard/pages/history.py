@@ -0,0 +1,118 @@
+from functools import lru_cache
+
+import dash
+import dash_bootstrap_components as dbc
+import plotly.graph_objects as go
+from dash import dcc, html, callback, clientside_callback
+from dash.dependencies import Input, Output
+from dash.exceptions import PreventUpdate
+from plotly.subplots import make_subplots
+
+from coincap.config import dashboard_setting
+from coincap.history import INTERVAL_MS
+from coincap.series import RANGES, HistoryLoader
+from dashboard.data import storage
+
+# Chart widths are rounded to this many pixels, so similar windows share cached series
+WIDTH_STEP = 100
+DEFAULT_WIDTH = 1000
+
+dash.register_page(__name__)
+
+
+@lru_cache(maxsize=None)
+def history():
+    # Downsampled series, cached per (coin, interval, range, width) until new history rows are stored; the coins
+    # and watermarks are re-read on the refresh schedule. Created on first use, so importing the page opens no storage.
+    return HistoryLoader(storage(), ttl=int(dashboard_setting('COINCAP_REFRESH_SECONDS')))
+
+
+def history_card(coins, interval, intervals):
+    return dbc.Card(
+        [
+            dbc.CardBody(
+                [
+                    html.H4("Price History", className='card-title'),
+                    html.P("Select Coins: ", className="card-text"
+                           ),
+                    dcc.Dropdown(
+                        id='history-coins',
+                        options=[{'label': i, 'value': i} for i in coins],
+                        value=coins[:3], multi=True, className="mb-4", style={'color': 'green'}
+                    ),
+                    dbc.RadioItems(id='history-range', options=[{'label': r, 'value': r} for r in RANGES],
+                                   value='90d', inline=True),
+                    # Only the intervals the pipeline stores; there is nothing to choose while that is one
+                    dbc.RadioItems(id='history-interval', options=[{'label': i, 'value': i} for i in intervals],
+                                   value=interval, inline=True,
+                                   style={} if len(intervals) > 1 else {'display': 'none'}),
+                ]
+            )
+        ], color="info", inverse=True,
+    )
+
+
+# A function, so every page load lists the coins and intervals that have history at that moment
+def layout():
+    intervals = history().intervals()
+    interval = dashboard_setting('COINCAP_HISTORY_INTERVAL')
+    if intervals and interval not in intervals:
+        interval = intervals[0]
+    return html.Div(
+        [
+            html.Div(history_card(history().coins(interval), interval, intervals or [interval])),
+            html.Br(),
+            dcc.Graph(id='history-chart', style={'height': '40rem'}),
+            # The chart's width in pixels, measured by the browser; the server sends no more points than that
+            dcc.Store(id='history-width'),
+        ]
+    )
+
+
+clientside_callback(
+    """
+    function(id) {
+        const chart = document.getElementById('history-chart');
+        return (chart && chart.offsetWidth) || window.innerWidth;
+    }
+    """,
+    Output('history-width', 'data'),
+    Input('history-width', 'id'),
+)
+
+
+@callback(Output('history-coins', 'options'),
+          Input('history-interval', 'value'),
+          prevent_initial_call=True)
+def interval_coins(interval):
+    # The coins stored at another interval may differ
+    return [{'label': i, 'value': i} for i in history().coins(interval)]
+
+
+@callback(Output('history-chart', 'figure'),
+          [Input('history-coins', 'value'),
+           Input('history-range', 'value'),
+           Input('history-interval', 'value'),
+           Input('history-width', 'data')])
+def history_chart(coins, range_name, interval, width):
+    if not coins or range_name not in RANGES or interval not in INTERVAL_MS:
+        raise PreventUpdate
+    width = max(WIDTH_STEP, round((width or DEFAULT_WIDTH) / WIDTH_STEP) * WIDTH_STEP)
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.7, 0.3], vertical_spacing=0.05)
+    stored = shown = 0
+    for coin in coins:
+        series = history().load(coin, interval, range_name, width)
+        if series is None:
+            continue
+        stored += series['points']
+        shown += len(series['time'])
+        fig.add_trace(go.Scattergl(x=series['time'].astype('datetime64[ms]'), y=series['priceUsd'], name=coin,
+                                   mode='lines', legendgroup=coin), row=1, col=1)
+        days, volumes = series['volumeUsd24Hr']
+        fig.add_trace(go.Bar(x=days, y=volumes, name=f'{coin} volume', legendgroup=coin, showlegend=False),
+                      row=2, col=1)
+    fig.update_yaxes(title_text='Price (USD)', row=1, col=1)
+    fig.update_yaxes(title_text='24h volume (USD)', row=2, col=1)
+    fig.update_layout(title=f'{interval} prices, {range_name}: {shown} of {stored} points shown',
+                      barmode='group', hovermode='x unified', margin={'t': 60})
+    return fig
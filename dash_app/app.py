@@ -1,93 +1,16 @@
-import dash
-import dash_bootstrap_components as dbc
-from dash import Input, Output, dcc, html
+import os
+import sys
 
-app = dash.Dash(external_stylesheets=[dbc.themes.BOOTSTRAP], use_pages=True, suppress_callback_exceptions=True)
+# The dashboard package and the pipeline's storage layer live in dags/ (dags/dashboard, dags/coincap)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'dags'))
 
-# the style arguments for the sidebar. We use position:fixed and a fixed width
-SIDEBAR_STYLE = {
-    "position": "fixed",
-    "top": 0,
-    "left": 0,
-    "bottom": 0,
-    "width": "16rem",
-    "padding": "2rem 1rem",
-    "background-color": "#f8f9fa",
-}
-
-# the styles for the main content position it to the right of the sidebar and
-# add some padding.
-CONTENT_STYLE = {
-    "margin-left": "15rem",
-    "margin-right": "5rem",
-    "padding": "2rem 1rem",
-}
-
-sidebar = html.Div(
-    [
-        html.H2("Sidebar", className="display-4"),
-        html.Hr(),
-        html.P(
-            "A simple sidebar layout with navigation links", className="lead"
-        ),
-        dbc.Nav(
-            [
-                dbc.NavLink(
-                    [
-                        html.Div(page["name"], className="ms-2"),
-                    ],
-                    href=page["path"],
-                    active="exact",
-                )
-                for page in dash.page_registry.values()
-            ],
-            vertical=True,
-            pills=True,
-        ),
-    ],
-    style=SIDEBAR_STYLE,
-)
-
-# content = html.Div(id="page-content", style=CONTENT_STYLE)
-content = html.Div([
-    dbc.Row(
-        [
-            dbc.Col(
-                [
-                    sidebar
-                ], xs=4, sm=4, md=2, lg=2, xl=2, xxl=2),
-
-            dbc.Col(
-                [
-                    dash.page_container
-                ], xs=8, sm=8, md=10, lg=10, xl=10, xxl=10)
-        ]
-    )
-], id="page-content", style=CONTENT_STYLE)
-
-app.layout = html.Div([dcc.Location(id="url"), sidebar, content])
-from pages.assets import layout as asset_layout
-from pages.exchanges import layout
-
-
-@app.callback(Output("page-content", "children"), [Input("url", "pathname")])
-def render_page_content(pathname):
-    if pathname == "/":
-        return html.P("This is the content of the home page!")
-    elif pathname == "/exchanges":
-        return layout
-    elif pathname == "/assets":
-        return asset_layout
-    # If the user tries to reach a different page, return a 404 message
-    return html.Div(
-        [
-            html.H1("404: Not found", className="text-danger"),
-            html.Hr(),
-            html.P(f"The pathname {pathname} was not recognised..."),
-        ],
-        className="p-3 bg-light rounded-3",
-    )
+from dashboard.app import create_app
 
+# MinIO on localhost unless COINCAP_STORAGE_URL / AWS_* say otherwise, see coincap.config
+app = create_app()
+# The WSGI application, for gunicorn: gunicorn --chdir dash_app app:server (see the Makefile)
+server = app.server
 
 if __name__ == "__main__":
-    app.run_server(port=8888, debug=True)
+    # Development server only; the debugger and reloader stay off unless DASH_DEBUG=1
+    app.run_server(port=8888, debug=os.environ.get('DASH_DEBUG') == '1')
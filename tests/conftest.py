@@ -0,0 +1,31 @@
+import gzip
+import json
+import os
+import sys
+
+import pytest
+
+# The pipeline and dashboard packages live in dags/, as in the Airflow image
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'dags'))
+
+from coincap.storage import LocalStorage
+
+SERVED_MS = 1735689600000
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return LocalStorage(tmp_path / 'bucket')
+
+
+@pytest.fixture
+def make_blob():
+    """``make_blob(records, page_size)``: a gzip raw blob, one API response per line, as coincap.rawstore stores it."""
+    def make(records, page_size=1000):
+        lines = []
+        for start in range(0, max(len(records), 1), page_size):
+            page = {'data': records[start:start + page_size], 'timestamp': SERVED_MS}
+            lines.append(json.dumps(page).encode('utf-8'))
+        return gzip.compress(b'\n'.join(lines) + b'\n')
+
+    return make
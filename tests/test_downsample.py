@@ -0,0 +1,47 @@
+import numpy as np
+
+from coincap.downsample import lttb, minmax
+
+
+def series(n, seed=0):
+    x = np.arange(n, dtype='float64')
+    y = np.random.default_rng(seed).normal(size=n).cumsum()
+    return x, y
+
+
+def test_lttb_keeps_threshold_points_in_order_with_both_ends():
+    x, y = series(10_000)
+    keep = lttb(x, y, 500)
+    assert len(keep) == 500
+    assert keep[0] == 0 and keep[-1] == len(x) - 1
+    assert (np.diff(keep) > 0).all()
+
+
+def test_lttb_keeps_a_spike():
+    x, y = series(5000)
+    y[2345] = y.max() + 100
+    assert 2345 in lttb(x, y, 100)
+
+
+def test_lttb_keeps_short_series_as_they_are():
+    x, y = series(50)
+    assert lttb(x, y, 100).tolist() == list(range(50))
+    assert lttb(x, y, 2).tolist() == list(range(50))
+
+
+def test_lttb_of_a_line_is_evenly_spread():
+    x = np.arange(1001, dtype='float64')
+    keep = lttb(x, 2 * x, 11)
+    assert len(keep) == 11
+    assert np.abs(np.diff(keep) - 100).max() <= 100
+
+
+def test_minmax_keeps_every_bucket_extreme():
+    x, y = series(10_000, seed=1)
+    keep = minmax(x, y, 200)
+    assert len(keep) <= 200
+    assert (np.diff(keep) > 0).all()
+    assert y.argmin() in keep and y.argmax() in keep
+    edges = np.linspace(0, len(y), 101).astype('int64')
+    for start, end in zip(edges[:-1], edges[1:]):
+        assert {start + y[start:end].argmin(), start + y[start:end].argmax()} <= set(keep.tolist())
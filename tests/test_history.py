@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from coincap.history import DAY_MS, load_history, read_month, read_watermark, windows
+
+NOW_MS = 1736000000000  # 2025-01-04 14:13:20 UTC
+
+
+class Response:
+    def __init__(self, body):
+        self.content = body
+
+    def raise_for_status(self):
+        pass
+
+
+class Session:
+    """Serves every bucket of ``interval_ms`` in the requested range, like the history endpoint."""
+
+    def __init__(self, interval_ms, extra=()):
+        self.interval_ms = interval_ms
+        self.extra = list(extra)
+        self.requests = []
+
+    def get(self, url, params=None, timeout=None):
+        self.requests.append(params)
+        first = -(-params['start'] // self.interval_ms) * self.interval_ms
+        rows = [{'time': t, 'priceUsd': str(t // self.interval_ms)}
+                for t in range(first, params['end'] + 1, self.interval_ms)]
+        return Response(json.dumps({'data': rows + self.extra}).encode('utf-8'))
+
+
+def test_first_load_covers_the_lookback_and_stops_before_the_open_bucket(storage):
+    session = Session(DAY_MS, extra=[{'time': NOW_MS, 'priceUsd': '1'}])
+    added = load_history(storage, 'http://api/history', 'bitcoin', 'd1', now_ms=NOW_MS, session=session,
+                         lookback_days=10)
+    assert added == 10
+    watermark = read_watermark(storage, 'bitcoin', 'd1')
+    # The bucket still in progress (today) is neither requested nor stored
+    assert watermark == NOW_MS - NOW_MS % DAY_MS - DAY_MS
+    times = [row['time'] for row in read_month(storage, 'bitcoin', 'd1', '2024-12')]
+    times += [row['time'] for row in read_month(storage, 'bitcoin', 'd1', '2025-01')]
+    assert times == list(range(watermark - 9 * DAY_MS, watermark + 1, DAY_MS))
+
+
+def test_a_later_load_fetches_only_what_is_new(storage):
+    load_history(storage, 'http://api/history', 'bitcoin', 'd1', now_ms=NOW_MS, session=Session(DAY_MS),
+                 lookback_days=10)
+    watermark = read_watermark(storage, 'bitcoin', 'd1')
+    session = Session(DAY_MS)
+    assert load_history(storage, 'http://api/history', 'bitcoin', 'd1', now_ms=NOW_MS, session=session) == 0
+    assert read_watermark(storage, 'bitcoin', 'd1') == watermark
+
+    session = Session(DAY_MS)
+    added = load_history(storage, 'http://api/history', 'bitcoin', 'd1', now_ms=NOW_MS + 2 * DAY_MS, session=session)
+    assert added == 2
+    assert [r['start'] for r in session.requests] == [watermark + 1]
+    assert len(read_month(storage, 'bitcoin', 'd1', '2025-01')) == 5
+
+
+def test_long_ranges_are_requested_in_windows(storage):
+    session = Session(60 * 60 * 1000)
+    load_history(storage, 'http://api/history', 'bitcoin', 'h1', now_ms=NOW_MS, session=session, lookback_days=75)
+    assert len(session.requests) == 3
+    assert all(end - start < 30 * DAY_MS for start, end in ((r['start'], r['end']) for r in session.requests))
+    assert list(windows(0, 10 * DAY_MS - 1, 'm15')) == [(0, 7 * DAY_MS - 1), (7 * DAY_MS, 10 * DAY_MS - 1)]
+
+
+def test_an_unknown_interval_is_rejected(storage):
+    with pytest.raises(ValueError):
+        load_history(storage, 'http://api/history', 'bitcoin', 'w1', now_ms=NOW_MS, session=Session(DAY_MS))
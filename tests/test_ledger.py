@@ -0,0 +1,20 @@
+from coincap.ledger import pending_jobs, read_ledger, source_etags, write_ledger
+
+JOBS = [('raw/dt=2025-01-01/assets/assets.json.gz', 'clean/dt=2025-01-01/assets/coincap_assets.parquet'),
+        ('raw/dt=2025-01-01/exchanges/exchanges.json.gz', 'clean/dt=2025-01-01/exchanges/coincap_exchanges.parquet')]
+
+
+def test_only_missing_or_changed_outputs_are_pending(storage):
+    for source, _ in JOBS:
+        storage.put(source, b'v1')
+    etags = source_etags(storage, [source for source, _ in JOBS] * 2, max_workers=2)
+    assert sorted(etags) == sorted(source for source, _ in JOBS)
+    assert pending_jobs(JOBS, read_ledger(storage, '2025-01-01'), etags) == JOBS
+
+    write_ledger(storage, '2025-01-01', {dest: {'source': source, 'etag': etags[source]} for source, dest in JOBS})
+    assert pending_jobs(JOBS, read_ledger(storage, '2025-01-01'), etags) == []
+
+    # A source written again gets a new ETag, and only its output is redone
+    storage.put(JOBS[1][0], b'v2')
+    etags = source_etags(storage, [source for source, _ in JOBS], max_workers=2)
+    assert pending_jobs(JOBS, read_ledger(storage, '2025-01-01'), etags) == [JOBS[1]]
@@ -0,0 +1,97 @@
+import math
+from datetime import date
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from coincap.layout import clean_key, coin_markets_key
+from coincap.lookup import RowIndex, asset_loader, markets_loader, rows_loader
+from coincap.provider import LatestPartition
+from coincap.schema import apply_schema
+
+ASSETS = pa.Table.from_pandas(apply_schema(pd.DataFrame({
+    'id': ['bitcoin', 'ethereum', 'bitcoin', 'tether', None],
+    'symbol': ['BTC', 'ETH', 'BTC', '', None],
+    'name': ['Bitcoin', 'Ethereum', 'Bitcoin', 'Tether', None],
+    'marketCapUsd': ['100', '50', '100', None, '1'],
+    'changePercent24Hr': ['1.5', '-2', '1.5', '0', '0'],
+    'volumeUsd24Hr': ['10', '5', '20', None, '1'],
+})), preserve_index=False)
+
+
+def test_row_index_keeps_the_first_appearance_order():
+    index = RowIndex(ASSETS['name'])
+    # A categorical column: its dictionary is sorted, the index is not
+    assert pa.types.is_dictionary(ASSETS['name'].type)
+    assert index.values == ['Bitcoin', 'Ethereum', 'Tether']
+    assert index.rows('Bitcoin').tolist() == [0, 2]
+    assert index.rows('Tether').tolist() == [3]
+    assert index.rows('Dogecoin') is None
+
+
+def test_row_index_of_a_plain_column():
+    index = RowIndex(pa.chunked_array([['b', 'a'], ['b', None, 'c']]))
+    assert index.values == ['b', 'a', 'c']
+    assert index.rows('b').tolist() == [0, 2]
+
+
+def test_sums_by_value():
+    index = RowIndex(ASSETS['name'])
+    totals = index.sums(ASSETS['volumeUsd24Hr'])
+    assert totals[index.group('Bitcoin')] == 30
+    assert math.isnan(totals[index.group('Tether')])
+
+
+def test_assets_are_made_from_their_rows():
+    load = asset_loader(ASSETS, RowIndex(ASSETS['name']))
+    bitcoin = load('Bitcoin')
+    assert [record['volumeUsd24Hr'] for record in bitcoin['records']] == [10, 20]
+    assert (bitcoin['id'], bitcoin['marketCapUsd'], bitcoin['volumeUsd24Hr']) == ('bitcoin', 100, 30)
+    tether = load('Tether')
+    assert (tether['symbol'], tether['marketCapUsd'], tether['volumeUsd24Hr']) == ('N/A', 'N/A', 'N/A')
+    assert load('Dogecoin') is None
+
+
+def test_rows_loader_pages_one_value_with_placeholders():
+    load = rows_loader(ASSETS, RowIndex(ASSETS['name']))
+    records, page_count = load('Tether').page(0, 10)
+    assert page_count == 1
+    assert records[0]['symbol'] == 'N/A' and records[0]['volumeUsd24Hr'] == 'N/A'
+    records, _ = load('Bitcoin').page(0, 10, [{'column_id': 'volumeUsd24Hr', 'direction': 'desc'}])
+    assert [record['volumeUsd24Hr'] for record in records] == [20, 10]
+    assert load('Dogecoin') is None
+
+
+def test_partition_builds_from_an_arrow_table(storage, tmp_path):
+    built = []
+
+    def build(table, dt):
+        built.append(type(table))
+        return {'names': RowIndex(table['name']).values}
+
+    key = clean_key(date.today().isoformat(), 'assets', 'coincap_assets')
+    partition = LatestPartition(storage, 'assets', 'coincap_assets', build, ['id', 'name'],
+                                cache_dir=tmp_path / 'cache')
+    # Nothing stored yet: the page gets an empty table with the required columns
+    assert partition.current()['names'] == []
+
+    sink = pa.BufferOutputStream()
+    pq.write_table(ASSETS, sink)
+    storage.put(key, sink.getvalue().to_pybytes())
+    assert partition.refresh()
+    assert partition.current()['names'] == ['Bitcoin', 'Ethereum', 'Tether']
+    assert built == [pa.Table, pa.Table]
+
+
+def test_markets_that_land_later_are_found(storage, tmp_path):
+    load = markets_loader(storage, '2025-01-01', cache_dir=tmp_path / 'cache')
+    assert load('bitcoin').page(0, 10) == ([], 1)
+
+    # The transform uploaded the coin's markets after the assets file
+    sink = pa.BufferOutputStream()
+    pq.write_table(pa.table({'exchangeId': ['binance'], 'baseId': ['bitcoin']}), sink)
+    storage.put(coin_markets_key('2025-01-01', 'bitcoin'), sink.getvalue().to_pybytes())
+    markets = load('bitcoin')
+    assert markets.page(0, 10) == ([{'exchangeId': 'binance', 'baseId': 'bitcoin'}], 1)
+    assert load('bitcoin') is markets
@@ -0,0 +1,65 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from coincap.history import append_rows, write_watermark
+from coincap.metrics import PERIODS_PER_YEAR, compute_metrics, correlation_matrix, derive_metrics
+from coincap.storage import read_parquet
+
+DATES = pd.date_range('2025-01-01', periods=4, freq='D')
+PRICES = pd.DataFrame({'up': [1.0, 2.0, 4.0, 2.0], 'twice': [2.0, 4.0, 8.0, 4.0], 'inverse': [4.0, 2.0, 1.0, 2.0]},
+                      index=DATES)
+
+
+def metric(long, coin, name):
+    return long.loc[long['coin'] == coin, name].tolist()
+
+
+def test_compute_metrics_of_a_known_series():
+    long = compute_metrics(PRICES, windows=(2,))
+    assert list(long.columns) == ['date', 'coin', 'priceUsd', 'logReturn', 'drawdown', 'ma2d', 'volatility2d']
+    assert len(long) == 12
+    returns = metric(long, 'up', 'logReturn')
+    assert math.isnan(returns[0])
+    assert returns[1:] == pytest.approx([math.log(2), math.log(2), -math.log(2)])
+    assert metric(long, 'up', 'drawdown') == [0.0, 0.0, 0.0, -0.5]
+    assert metric(long, 'up', 'ma2d')[1:] == [1.5, 3.0, 3.0]
+    volatility = metric(long, 'up', 'volatility2d')
+    assert math.isnan(volatility[1]) and volatility[2] == 0.0
+    assert volatility[3] == pytest.approx(np.std([math.log(2), -math.log(2)], ddof=1) * math.sqrt(PERIODS_PER_YEAR))
+
+
+def test_missing_prices_are_dropped():
+    prices = PRICES.copy()
+    prices.loc[DATES[0], 'twice'] = np.nan
+    long = compute_metrics(prices, windows=(2,))
+    assert len(long) == 11
+
+
+def test_correlation_matrix_of_known_returns():
+    corr = correlation_matrix(PRICES, days=3).set_index('coin')
+    assert corr.loc['up', 'twice'] == pytest.approx(1.0)
+    assert corr.loc['up', 'inverse'] == pytest.approx(-1.0)
+    assert list(corr.index) == ['up', 'twice', 'inverse']
+
+
+def test_derive_metrics_without_coins_or_history_writes_nothing(storage):
+    assert derive_metrics(storage, [], '2025-01-04') == []
+    assert derive_metrics(storage, ['bitcoin'], '2025-01-04') == []
+    assert list(storage.list('clean/')) == []
+
+
+def test_derive_metrics_writes_both_files(storage):
+    for coin in ('bitcoin', 'ethereum'):
+        rows = [{'time': int(date.value // 10 ** 6), 'priceUsd': str(price)}
+                for date, price in zip(DATES, PRICES['up' if coin == 'bitcoin' else 'inverse'])]
+        append_rows(storage, coin, 'd1', rows)
+        write_watermark(storage, coin, 'd1', rows[-1]['time'])
+    keys = derive_metrics(storage, ['bitcoin', 'ethereum'], '2025-01-04')
+    assert keys == ['clean/dt=2025-01-04/metrics/coin_metrics.parquet',
+                    'clean/dt=2025-01-04/metrics/correlation.parquet']
+    metrics = read_parquet(storage, keys[0])
+    assert len(metrics) == 8
+    assert metrics.loc[metrics['coin'] == 'bitcoin', 'drawdown'].tolist() == [0.0, 0.0, 0.0, -0.5]
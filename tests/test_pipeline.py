@@ -0,0 +1,41 @@
+import pytest
+
+from coincap import config, pipeline
+from coincap.layout import write_manifest
+
+
+@pytest.fixture
+def run(storage, monkeypatch):
+    """``run(variables, entries) -> workers``: transform_data for a day of ``entries`` of 100 KB raw markets."""
+    used = []
+
+    def transform_objects(storage, jobs, workers=None, io_threads=None, on_written=None):
+        used.append(workers)
+        return [dest for _, dest in jobs]
+
+    def run(variables, count):
+        entries = [{'key': f'raw/dt=2025-01-01/markets/coin-{n}.json.gz', 'dataset': 'markets', 'base': f'coin-{n}',
+                    'bytes': 100 * 1024} for n in range(count)]
+        for entry in entries:
+            storage.put(entry['key'], b'raw')
+        write_manifest(storage, '2025-01-01', 'markets', entries)
+        monkeypatch.setattr(config, 'variable', lambda name, default=None: variables.get(name, default))
+        pipeline.transform_data('2025-01-01')
+        return used[-1]
+
+    monkeypatch.setattr(config, 'storage', lambda: storage)
+    monkeypatch.setattr(pipeline, 'transform_objects', transform_objects)
+    monkeypatch.setattr(pipeline, 'default_workers', lambda: 8)
+    return run
+
+
+def test_a_small_day_uses_one_worker_by_default(run):
+    assert run({}, 300) == 1
+
+
+def test_the_workers_variable_applies_to_small_days(run):
+    assert run({'COINCAP_TRANSFORM_WORKERS': '4'}, 300) == 4
+
+
+def test_workers_are_capped_by_the_objects(run):
+    assert run({'COINCAP_TRANSFORM_WORKERS': '4'}, 2) == 2
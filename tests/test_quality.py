@@ -0,0 +1,40 @@
+from coincap.quality import MAX_DUPLICATE_RATIO, id_columns_for, validate_object
+
+
+def market(n, coin='bitcoin'):
+    return {'exchangeId': f'exchange-{n}', 'baseId': coin, 'quoteId': 'tether', 'baseSymbol': 'BTC',
+            'quoteSymbol': 'USDT', 'priceUsd': '100.5', 'updated': 1735689600000}
+
+
+def check(storage, make_blob, records):
+    storage.put('raw/dt=2025-01-01/markets/markets.json.gz', make_blob(records, page_size=100))
+    return validate_object(storage, {'key': 'raw/dt=2025-01-01/markets/markets.json.gz', 'dataset': 'markets'})
+
+
+def test_a_row_repeated_across_a_page_boundary_is_a_warning(storage, make_blob):
+    # Ranks shifted between two page requests: the last row of page 1 comes again as the first of page 2
+    records = [market(n) for n in range(100)] + [market(99)] + [market(n) for n in range(100, 299)]
+    report = check(storage, make_blob, records)
+    assert report['duplicate_ids'] == 1
+    assert report['errors'] == []
+    assert report['warnings'] == ['1 duplicate ids']
+
+
+def test_many_duplicates_are_an_error(storage, make_blob):
+    records = [market(n % 50) for n in range(300)]
+    report = check(storage, make_blob, records)
+    assert report['duplicate_ids'] / report['rows'] > MAX_DUPLICATE_RATIO
+    assert report['errors'] == ['250 duplicate ids']
+
+
+def test_id_columns_follow_the_clean_dataset():
+    assert id_columns_for('clean/dt=2025-01-01/assets/coincap_assets.parquet') == ['id']
+    assert id_columns_for('clean/dt=2025-01-01/coin_markets/base=bitcoin.parquet') == ['exchangeId', 'baseId', 'quoteId']
+    assert id_columns_for('clean/0.parquet') == []
+
+
+def test_an_empty_payload_is_only_a_warning(storage, make_blob):
+    report = check(storage, make_blob, [])
+    assert report['rows'] == 0
+    assert report['errors'] == []
+    assert report['warnings'] == ['no rows']
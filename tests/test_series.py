@@ -0,0 +1,79 @@
+from coincap import series
+from coincap.history import DAY_MS, append_rows, write_watermark
+from coincap.series import HistoryLoader
+from coincap.storage import LocalStorage
+
+START_MS = 1735689600000
+
+
+class CountingStorage(LocalStorage):
+    def __init__(self, root):
+        super().__init__(root)
+        self.lists = 0
+        self.gets = 0
+
+    def list(self, prefix):
+        self.lists += 1
+        return super().list(prefix)
+
+    def get(self, key):
+        self.gets += 1
+        return super().get(key)
+
+
+def store_history(storage, coin, days):
+    rows = [{'time': START_MS + n * DAY_MS, 'priceUsd': str(100 + n)} for n in range(days)]
+    append_rows(storage, coin, 'd1', rows)
+    write_watermark(storage, coin, 'd1', rows[-1]['time'])
+
+
+def test_coins_and_watermarks_are_read_once_per_refresh(tmp_path, monkeypatch):
+    storage = CountingStorage(tmp_path / 'bucket')
+    store_history(storage, 'bitcoin', 20)
+    store_history(storage, 'ethereum', 20)
+    clock = [1000.0]
+    monkeypatch.setattr(series.time, 'monotonic', lambda: clock[0])
+    loader = HistoryLoader(storage, ttl=300)
+
+    assert loader.coins('d1') == ['bitcoin', 'ethereum']
+    first = loader.load('bitcoin', 'd1', '30d', 1000)
+    lists, gets = storage.lists, storage.gets
+    for _ in range(3):
+        assert loader.coins('d1') == ['bitcoin', 'ethereum']
+        assert loader.load('bitcoin', 'd1', '30d', 1000) is first
+    assert (storage.lists, storage.gets) == (lists, gets)
+
+    # A coin stored since is seen once the refresh interval has passed
+    store_history(storage, 'solana', 5)
+    assert loader.coins('d1') == ['bitcoin', 'ethereum']
+    clock[0] += 300
+    assert loader.coins('d1') == ['bitcoin', 'ethereum', 'solana']
+
+
+def test_new_rows_are_loaded_after_the_refresh(tmp_path, monkeypatch):
+    storage = LocalStorage(tmp_path / 'bucket')
+    store_history(storage, 'bitcoin', 10)
+    clock = [1000.0]
+    monkeypatch.setattr(series.time, 'monotonic', lambda: clock[0])
+    loader = HistoryLoader(storage, ttl=300)
+
+    assert loader.load('bitcoin', 'd1', 'all', 1000)['points'] == 10
+    store_history(storage, 'bitcoin', 12)
+    assert loader.load('bitcoin', 'd1', 'all', 1000)['points'] == 10
+    clock[0] += 300
+    loaded = loader.load('bitcoin', 'd1', 'all', 1000)
+    assert loaded['points'] == 12
+    assert loaded['priceUsd'][-1] == 111.0
+
+
+def test_a_coin_without_history_loads_nothing(storage):
+    assert HistoryLoader(storage).load('bitcoin', 'd1', '30d', 1000) is None
+    assert HistoryLoader(storage).coins('d1') == []
+
+
+def test_only_intervals_with_history_are_offered(storage):
+    assert HistoryLoader(storage).intervals() == []
+    store_history(storage, 'bitcoin', 3)
+    append_rows(storage, 'bitcoin', 'h1', [{'time': START_MS, 'priceUsd': '1'}])
+    write_watermark(storage, 'bitcoin', 'h1', START_MS)
+    assert HistoryLoader(storage).intervals() == ['h1', 'd1']
@@ -0,0 +1,51 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from coincap.shared import open_table, publish
+
+TABLE = pa.table({'id': ['bitcoin', 'ethereum'], 'priceUsd': [100.0, 2.5]})
+
+
+def put_parquet(storage, key):
+    sink = pa.BufferOutputStream()
+    pq.write_table(TABLE, sink)
+    storage.put(key, sink.getvalue().to_pybytes())
+
+
+def cached(cache_dir):
+    return sorted(str(path.relative_to(cache_dir)) for path in cache_dir.rglob('*.arrow'))
+
+
+def test_publish_writes_one_copy_per_version(storage, tmp_path):
+    key = 'clean/dt=2025-01-01/assets/coincap_assets.parquet'
+    put_parquet(storage, key)
+    path = publish(storage, key, 'a', tmp_path / 'cache')
+    assert open_table(path).equals(TABLE)
+    assert publish(storage, key, 'a', tmp_path / 'cache') == path
+    publish(storage, key, 'b', tmp_path / 'cache')
+    assert cached(tmp_path / 'cache') == ['clean/dt=2025-01-01/assets/coincap_assets.parquet.b.arrow']
+
+
+def test_a_newer_day_removes_the_older_days_of_its_dataset(storage, tmp_path):
+    cache = tmp_path / 'cache'
+    for key in ['clean/dt=2025-01-01/assets/coincap_assets.parquet',
+                'clean/dt=2025-01-01/coin_markets/base=bitcoin.parquet',
+                'clean/dt=2025-01-02/assets/coincap_assets.parquet',
+                'clean/dt=2025-01-03/coin_markets/base=bitcoin.parquet']:
+        put_parquet(storage, key)
+
+    publish(storage, 'clean/dt=2025-01-01/assets/coincap_assets.parquet', 'a', cache)
+    publish(storage, 'clean/dt=2025-01-01/coin_markets/base=bitcoin.parquet', 'a', cache)
+    publish(storage, 'clean/dt=2025-01-02/assets/coincap_assets.parquet', 'a', cache)
+    # Other datasets of the older day stay until a newer day of their own is written
+    assert cached(cache) == ['clean/dt=2025-01-01/coin_markets/base=bitcoin.parquet.a.arrow',
+                             'clean/dt=2025-01-02/assets/coincap_assets.parquet.a.arrow']
+
+    publish(storage, 'clean/dt=2025-01-03/coin_markets/base=bitcoin.parquet', 'a', cache)
+    assert cached(cache) == ['clean/dt=2025-01-02/assets/coincap_assets.parquet.a.arrow',
+                             'clean/dt=2025-01-03/coin_markets/base=bitcoin.parquet.a.arrow']
+    assert not (cache / 'clean' / 'dt=2025-01-01').exists()
+
+    # A process still serving an older day may write it again; that removes nothing newer
+    publish(storage, 'clean/dt=2025-01-01/assets/coincap_assets.parquet', 'a', cache)
+    assert (cache / 'clean/dt=2025-01-02/assets/coincap_assets.parquet.a.arrow').exists()
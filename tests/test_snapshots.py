@@ -0,0 +1,64 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from coincap.snapshots import (append_snapshot, closed_months, compact_month, compacted_key, daily_key, read_index,
+                               scan)
+
+
+def put_assets(storage, dt, prices):
+    key = f'clean/dt={dt}/assets/coincap_assets.parquet'
+    table = pa.table({'id': pa.array(list(prices)).dictionary_encode(), 'priceUsd': list(prices.values())})
+    sink = pa.BufferOutputStream()
+    pq.write_table(table, sink)
+    storage.put(key, sink.getvalue().to_pybytes())
+    return key
+
+
+def append(storage, dt, prices):
+    return append_snapshot(storage, 'assets', dt, put_assets(storage, dt, prices))
+
+
+def rows(table):
+    return sorted((str(row['dt']), row['id'], row['priceUsd']) for row in table.to_pylist())
+
+
+def test_compact_month_merges_the_daily_files(storage):
+    append(storage, '2025-01-01', {'bitcoin': 1.0, 'ethereum': 2.0})
+    append(storage, '2025-01-02', {'bitcoin': 3.0})
+    append(storage, '2025-02-01', {'bitcoin': 4.0})
+    assert closed_months(storage, 'assets', '2025-02-01') == ['2025-01']
+
+    merged = compact_month(storage, 'assets', '2025-01')
+    assert merged == [daily_key('assets', '2025-01-01'), daily_key('assets', '2025-01-02')]
+    files = read_index(storage, 'assets')
+    assert sorted(files) == [compacted_key('assets', '2025-01'), daily_key('assets', '2025-02-01')]
+    assert files[compacted_key('assets', '2025-01')]['min'] == {'dt': '2025-01-01', 'id': 'bitcoin'}
+    assert list(storage.list('snapshots/dataset=assets/month=2025-01/')) == [compacted_key('assets', '2025-01')]
+    assert closed_months(storage, 'assets', '2025-02-01') == []
+    assert rows(scan(storage, 'assets')) == [('2025-01-01', 'bitcoin', 1.0), ('2025-01-01', 'ethereum', 2.0),
+                                             ('2025-01-02', 'bitcoin', 3.0), ('2025-02-01', 'bitcoin', 4.0)]
+    assert compact_month(storage, 'assets', '2025-01') == []
+
+
+def test_a_rerun_day_replaces_its_compacted_rows(storage):
+    append(storage, '2025-01-01', {'bitcoin': 1.0})
+    append(storage, '2025-01-02', {'bitcoin': 2.0})
+    compact_month(storage, 'assets', '2025-01')
+    append(storage, '2025-01-02', {'bitcoin': 5.0, 'ethereum': 6.0})
+    compact_month(storage, 'assets', '2025-01')
+    assert rows(scan(storage, 'assets')) == [('2025-01-01', 'bitcoin', 1.0), ('2025-01-02', 'bitcoin', 5.0),
+                                             ('2025-01-02', 'ethereum', 6.0)]
+
+
+def test_scan_fetches_only_the_files_that_can_match(storage):
+    append(storage, '2025-01-01', {'bitcoin': 1.0})
+    append(storage, '2025-01-02', {'ethereum': 2.0})
+    append(storage, '2025-01-03', {'bitcoin': 3.0, 'ethereum': 4.0})
+    fetched = []
+    buffer = storage.buffer
+    storage.buffer = lambda key: fetched.append(key) or buffer(key)
+
+    table = scan(storage, 'assets', start='2025-01-02', keys=['bitcoin'], columns=['dt', 'id', 'priceUsd'])
+    assert rows(table) == [('2025-01-03', 'bitcoin', 3.0)]
+    assert fetched == [daily_key('assets', '2025-01-03')]
+    assert scan(storage, 'assets', start='2025-02-01').num_rows == 0
@@ -0,0 +1,44 @@
+from coincap.stream import iter_batches, iter_blob_lines
+
+from conftest import SERVED_MS
+
+
+def batches(blob, batch_size):
+    return list(iter_batches(iter_blob_lines(blob), batch_size))
+
+
+def test_records_come_in_batches_across_pages(make_blob):
+    records = [{'id': f'coin-{n}', 'priceUsd': str(n)} for n in range(25)]
+    frames = batches(make_blob(records, page_size=10), batch_size=7)
+    assert [len(frame) for frame in frames] == [7, 7, 7, 4]
+    assert [row for frame in frames for row in frame['id']] == [record['id'] for record in records]
+    assert (frames[0]['timestamp'] == frames[0]['timestamp'].iloc[0]).all()
+    assert frames[0]['timestamp'].iloc[0].value // 10 ** 6 == SERVED_MS
+
+
+def test_columns_keep_first_seen_order_and_missing_keys_are_null(make_blob):
+    records = [{'id': 'a', 'priceUsd': '1'}, {'id': 'b', 'explorer': 'x'}, {'priceUsd': '3', 'id': 'c'}]
+    frame, = batches(make_blob(records), batch_size=10)
+    assert list(frame.columns) == ['timestamp', 'id', 'priceUsd', 'explorer']
+    assert frame['priceUsd'].tolist() == ['1', None, '3']
+    assert frame['explorer'].tolist() == [None, 'x', None]
+
+
+def test_a_column_first_seen_in_a_later_batch(make_blob):
+    records = [{'id': 'a'}, {'id': 'b'}, {'id': 'c', 'rank': '3'}]
+    first, second = batches(make_blob(records), batch_size=2)
+    assert 'rank' not in first.columns
+    assert second['rank'].tolist() == ['3']
+
+
+def test_an_empty_payload_is_one_empty_frame(make_blob):
+    frame, = batches(make_blob([]), batch_size=10)
+    assert len(frame) == 0
+    assert list(frame.columns) == ['timestamp']
+
+
+def test_values_with_brackets_and_commas(make_blob):
+    records = [{'id': 'a', 'name': 'x], ["y', 'tags': [1, 2]}, {'id': 'b', 'name': '{}'}]
+    frame, = batches(make_blob(records), batch_size=10)
+    assert frame['name'].tolist() == ['x], ["y', '{}']
+    assert frame['tags'].tolist() == [[1, 2], None]
@@ -0,0 +1,69 @@
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from coincap.tables import ArrowTableSource, TableSource, parse_filter
+
+FRAME = pd.DataFrame({
+    'name': ['Bitcoin', 'Ethereum', 'bitcoin cash', 'Tether', None],
+    'priceUsd': [95000.0, 3400.0, 420.0, 1.0, None],
+    'rank': pd.array([1, 2, 15, 3, None], dtype='Int64'),
+    'quoteSymbol': pd.Categorical(['USD', 'EUR', 'USD', 'USD', 'EUR']),
+})
+
+
+@pytest.fixture(params=['pandas', 'arrow'])
+def source(request):
+    if request.param == 'pandas':
+        return TableSource(FRAME)
+    return ArrowTableSource(pa.Table.from_pandas(FRAME, preserve_index=False))
+
+
+def names(source, filter_query='', sort_by=None, page_current=0, page_size=10):
+    records, _ = source.page(page_current, page_size, sort_by, filter_query)
+    return [record['name'] for record in records]
+
+
+def test_parse_filter_reads_the_case_prefixed_operators_the_table_sends():
+    assert parse_filter('{priceUsd} s> 100 && {rank} s<= 3 && {name} i!= "tether"') == [
+        ('priceUsd', 'sgt', '100'), ('rank', 'sle', '3'), ('name', 'ine', 'tether')]
+    assert parse_filter('{priceUsd} s= 1 && {name} icontains bit && {name} scontains Bit') == [
+        ('priceUsd', 'seq', '1'), ('name', 'icontains', 'bit'), ('name', 'scontains', 'Bit')]
+    assert parse_filter('{priceUsd} >= 3400 && {rank} ne 2 && {name} datestartswith B') == [
+        ('priceUsd', 'ge', '3400'), ('rank', 'ne', '2'), ('name', 'datestartswith', 'B')]
+
+
+def test_parse_filter_skips_parts_it_cannot_read():
+    assert parse_filter('{priceUsd} ! 3 && nonsense && {rank} s< 3') == [('rank', 'slt', '3')]
+
+
+@pytest.mark.parametrize('filter_query, expected', [
+    # What the DataTable sends for "> 100", "= 1", "<= 3" typed in a numeric column
+    ('{priceUsd} s> 100', ['Bitcoin', 'Ethereum', 'bitcoin cash']),
+    ('{priceUsd} s= 1', ['Tether']),
+    ('{rank} s<= 3 && {priceUsd} s< 5000', ['Ethereum', 'Tether']),
+    ('{rank} s!= 2', ['Bitcoin', 'bitcoin cash', 'Tether']),
+    ('{priceUsd} gt 100 && {rank} le 2', ['Bitcoin', 'Ethereum']),
+    # Text columns: the default is contains, case-sensitive unless prefixed with i
+    ('{name} contains Bit', ['Bitcoin']),
+    ('{name} icontains bit', ['Bitcoin', 'bitcoin cash']),
+    ('{name} s= "Tether"', ['Tether']),
+    ('{name} i= "TETHER"', ['Tether']),
+    ('{quoteSymbol} s= EUR', ['Ethereum', None]),
+])
+def test_page_filters_like_the_datatable(source, filter_query, expected):
+    assert names(source, filter_query) == expected
+
+
+def test_page_sorts_numbers_with_missing_values_last(source):
+    sort_by = [{'column_id': 'priceUsd', 'direction': 'asc'}]
+    assert names(source, sort_by=sort_by) == ['Tether', 'bitcoin cash', 'Ethereum', 'Bitcoin', None]
+    sort_by = [{'column_id': 'quoteSymbol', 'direction': 'asc'}, {'column_id': 'rank', 'direction': 'desc'}]
+    assert names(source, sort_by=sort_by) == ['Ethereum', None, 'bitcoin cash', 'Tether', 'Bitcoin']
+
+
+def test_page_counts_pages_and_clamps_the_page_number(source):
+    records, page_count = source.page(7, 2, None, '')
+    assert page_count == 3
+    assert [record['name'] for record in records] == [None]
+    assert source.page(0, 2, None, '{priceUsd} s> 1e9') == ([], 1)
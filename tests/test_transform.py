@@ -0,0 +1,96 @@
+import threading
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from coincap.storage import LocalStorage
+from coincap.transform import transform_blob, transform_objects
+
+
+def asset(i):
+    return {'id': f'coin-{i}', 'rank': str(i + 1), 'name': f'Coin {i}', 'priceUsd': f'{100 / (i + 1):.4f}'}
+
+
+class InFlightStorage(LocalStorage):
+    """Counts the objects that have been downloaded and not yet uploaded."""
+
+    def __init__(self, root):
+        super().__init__(root)
+        self.lock = threading.Lock()
+        self.in_flight = self.peak = 0
+
+    def get(self, key):
+        body = super().get(key)
+        if key.startswith('raw/'):
+            with self.lock:
+                self.in_flight += 1
+                self.peak = max(self.peak, self.in_flight)
+        return body
+
+    def put(self, key, body, content_type=None, metadata=None):
+        super().put(key, body, content_type, metadata)
+        if key.startswith('clean/'):
+            with self.lock:
+                self.in_flight -= 1
+
+
+def test_transform_objects_bounds_blobs_by_cpu_workers(tmp_path, make_blob):
+    storage = InFlightStorage(tmp_path)
+    jobs = []
+    for n in range(20):
+        storage.put(f'raw/{n}.json.gz', make_blob([asset(i) for i in range(50)]))
+        jobs.append((f'raw/{n}.json.gz', f'clean/{n}.parquet'))
+
+    written = transform_objects(storage, jobs, workers=1, io_threads=8)
+
+    assert sorted(written) == sorted(dest for _, dest in jobs)
+    assert storage.peak <= 2
+
+
+def test_transform_blob_types_columns(make_blob):
+    table = pq.read_table(pa.py_buffer(transform_blob(make_blob([asset(i) for i in range(30)]), batch_size=7)))
+    assert table.num_rows == 30
+    assert table.schema.field('priceUsd').type == pa.float64()
+    assert table.schema.field('rank').type == pa.int64()
+
+
+def exchange(i, **extra):
+    return dict({'exchangeId': f'exchange-{i}', 'name': f'Exchange {i}', 'volumeUsd': f'{1e6 / (i + 1):.2f}'}, **extra)
+
+
+def test_transform_blob_casts_values_of_a_column_null_in_the_first_batch(make_blob):
+    records = [exchange(i, socket=None) for i in range(5)] + [exchange(i, socket=True) for i in range(5, 12)]
+    table = pq.read_table(pa.py_buffer(transform_blob(make_blob(records), batch_size=5)))
+    assert table.num_rows == 12
+    assert table['socket'].to_pylist() == [None] * 5 + ['true'] * 7
+
+
+def test_transform_blob_keeps_columns_first_seen_in_a_later_batch(make_blob):
+    records = [exchange(i) for i in range(5)] + [exchange(i, tradingPairs=str(i), exchangeUrl='https://x')
+                                                 for i in range(5, 9)]
+    table = pq.read_table(pa.py_buffer(transform_blob(make_blob(records), batch_size=5)))
+    assert table.column_names[-2:] == ['tradingPairs', 'exchangeUrl']
+    assert table['tradingPairs'].to_pylist() == [None] * 5 + [5, 6, 7, 8]
+    assert table['exchangeUrl'].to_pylist() == [None] * 5 + ['https://x'] * 4
+
+
+def test_transform_blob_fills_a_string_column_missing_from_a_later_batch(make_blob):
+    records = [exchange(i, exchangeUrl='https://x') for i in range(5)] + [exchange(i) for i in range(5, 8)]
+    table = pq.read_table(pa.py_buffer(transform_blob(make_blob(records), batch_size=5)))
+    assert table['exchangeUrl'].to_pylist() == ['https://x'] * 5 + [None] * 3
+
+
+def test_transform_objects_keeps_the_first_copy_of_a_repeated_row(storage, make_blob):
+    records = [asset(i) for i in range(10)] + [dict(asset(9), priceUsd='1.0')] + [asset(i) for i in range(10, 25)]
+    storage.put('raw/assets.json.gz', make_blob(records, page_size=10))
+    transform_objects(storage, [('raw/assets.json.gz', 'clean/dt=2025-01-01/assets/coincap_assets.parquet')],
+                      workers=1)
+    table = pq.read_table(pa.py_buffer(storage.get('clean/dt=2025-01-01/assets/coincap_assets.parquet')))
+    assert table.num_rows == 25
+    assert table['priceUsd'][9].as_py() == 10.0
+
+
+def test_transform_blob_drops_repeats_within_and_across_batches(make_blob):
+    records = [asset(i) for i in range(6)] + [asset(2), asset(5), asset(6), asset(6)]
+    table = pq.read_table(pa.py_buffer(transform_blob(make_blob(records), batch_size=4, id_columns=['id'])))
+    assert table['id'].to_pylist() == [f'coin-{i}' for i in range(7)]